@@ -1,8 +1,27 @@
 import os
 
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init, worker_process_shutdown
+from django.db import connections
+
+from FINANCE_CORE import metrics
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FINANCE_CORE.settings")
 app = Celery("FINANCE_CORE_CELERY_APP")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+def discard_inherited_pools(**kwargs):
+    # A pool the parent opened before forking has no worker threads in the
+    # child and shares its sockets with the parent, so it is dropped without
+    # being closed; the child opens its own on first use.
+    for database in connections.all():
+        getattr(database, "_connection_pools", {}).pop(database.alias, None)
+
+
+worker_init.connect(metrics.reset_multiproc_dir)
+task_prerun.connect(metrics.task_started)
+task_postrun.connect(metrics.task_finished)
+worker_process_init.connect(discard_inherited_pools)
+worker_process_shutdown.connect(metrics.worker_process_shutdown)
@@ -0,0 +1,236 @@
+import glob
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+logger = logging.getLogger("FINANCE_CORE.metrics")
+
+# prometheus_client writes every sample to a per-process file under this
+# directory, so the gunicorn and celery workers can be scraped as one.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# The files are named after the PID, and PIDs repeat across containers, so
+# each service writes to its own directory. /metrics merges the directories
+# listed here (os.pathsep separated), defaulting to PROMETHEUS_MULTIPROC_DIR.
+MULTIPROC_SCRAPE_DIRS_ENV = "METRICS_MULTIPROC_DIRS"
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+FLOW_DURATION = Histogram(
+    "finance_core_flow_duration_seconds", "Duration of the flows wrapped with timed().", ["flow"]
+)
+REQUEST_DURATION = Histogram(
+    "finance_core_request_duration_seconds", "Request latency per route.", ["view", "method", "status"]
+)
+REQUEST_QUERIES = Histogram(
+    "finance_core_request_queries", "SQL queries run per request.", ["view", "method"], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_SQL_DURATION = Histogram(
+    "finance_core_request_sql_duration_seconds", "Time spent in SQL per request.", ["view", "method"]
+)
+SERIALIZER_DURATION = Histogram(
+    "finance_core_serializer_duration_seconds", "Time spent building serializer output.", ["serializer"]
+)
+TASK_DURATION = Histogram(
+    "finance_core_task_duration_seconds", "Celery task runtime.", ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+TASK_ROWS = Counter("finance_core_task_rows", "Rows processed by Celery tasks.", ["task", "kind"])
+DB_POOL_CONNECTIONS = Gauge(
+    "finance_core_db_pool_connections", "Connections in the database pools, summed over live processes.",
+    ["database", "state"], multiprocess_mode="livesum",
+)
+DB_POOL_EVENTS = Counter(
+    "finance_core_db_pool_events", "psycopg pool counters: requests, waits, connections opened, lost or bad.",
+    ["database", "event"],
+)
+
+# psycopg_pool stats that describe the pool now; the others are counters
+# that pop_stats() resets.
+DB_POOL_GAUGES = {
+    "pool_min": "min",
+    "pool_max": "max",
+    "pool_size": "open",
+    "pool_available": "idle",
+    "requests_waiting": "waiting",
+}
+
+
+@contextmanager
+def timed(flow):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        FLOW_DURATION.labels(flow).observe(duration)
+        logger.info("flow=%s duration_ms=%.2f", flow, duration * 1000)
+
+
+@contextmanager
+def observe_serializer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SERIALIZER_DURATION.labels(name).observe(time.perf_counter() - start)
+
+
+class QueryRecorder:
+    def __init__(self, keep=0):
+        self.count = 0
+        self.duration = 0.0
+        self.keep = keep
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            # Parameters are left out on purpose: they carry user data.
+            if len(self.statements) < self.keep:
+                self.statements.append((context["connection"].alias, duration, sql))
+
+
+# Under ASGI the queries of a request run on other threads, and so on other
+# connection objects, than the middleware. Every connection forwards to the
+# recorder of the current context instead, which sync_to_async carries over.
+_query_recorder = ContextVar("query_recorder", default=None)
+
+
+def _forward_query(execute, sql, params, many, context):
+    recorder = _query_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if _forward_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_forward_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextmanager
+def recording(recorder):
+    token = _query_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _query_recorder.reset(token)
+
+
+def record_queries(keep=0):
+    return recording(QueryRecorder(keep))
+
+
+_stream_end = object()
+
+
+# Streamed content is read after the view returned, outside of record_queries():
+# each chunk is pulled with the recorder back in place, and finished() runs once
+# the stream is exhausted or closed.
+def record_stream_queries(chunks, recorder, finished):
+    chunks = iter(chunks)
+    try:
+        while True:
+            with recording(recorder):
+                chunk = next(chunks, _stream_end)
+            if chunk is _stream_end:
+                return
+            yield chunk
+    finally:
+        finished()
+
+
+async def arecord_stream_queries(chunks, recorder, finished):
+    chunks = aiter(chunks)
+    try:
+        while True:
+            with recording(recorder):
+                chunk = await anext(chunks, _stream_end)
+            if chunk is _stream_end:
+                return
+            yield chunk
+    finally:
+        finished()
+
+
+_task_started = {}
+
+
+def task_started(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    start = _task_started.pop(task_id, None)
+    if start is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - start)
+    record_pool_stats()
+
+
+def count_task_rows(task, **rows):
+    for kind, count in rows.items():
+        TASK_ROWS.labels(task, kind).inc(count)
+
+
+def record_pool_stats():
+    for database in connections.all():
+        pool = getattr(database, "pool", None)
+        if pool is None:
+            continue
+        for stat, value in pool.pop_stats().items():
+            if stat in DB_POOL_GAUGES:
+                DB_POOL_CONNECTIONS.labels(database.alias, DB_POOL_GAUGES[stat]).set(value)
+            else:
+                DB_POOL_EVENTS.labels(database.alias, stat).inc(value)
+
+
+def reset_multiproc_dir(**kwargs):
+    # Files left by an earlier run would be added to this run's counters.
+    path = os.environ.get(MULTIPROC_DIR_ENV)
+    if not path:
+        return
+    os.makedirs(path, exist_ok=True)
+    for file in glob.glob(os.path.join(path, "*.db")):
+        os.remove(file)
+
+
+def mark_process_dead(pid):
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
+
+
+def worker_process_shutdown(**kwargs):
+    mark_process_dead(os.getpid())
+
+
+class MultiDirectoryCollector:
+    def __init__(self, paths):
+        self.paths = paths
+
+    def collect(self):
+        files = [file for path in self.paths for file in glob.glob(os.path.join(path, "*.db"))]
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def export_metrics():
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        paths = os.environ.get(MULTIPROC_SCRAPE_DIRS_ENV) or os.environ[MULTIPROC_DIR_ENV]
+        registry = CollectorRegistry()
+        registry.register(MultiDirectoryCollector(paths.split(os.pathsep)))
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,89 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import (
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUEST_SQL_DURATION,
+    arecord_stream_queries,
+    logger,
+    record_pool_stats,
+    record_queries,
+    record_stream_queries,
+)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.slow_request_seconds = settings.METRICS_SLOW_REQUEST_MS / 1000
+        self.slow_request_sample_rate = settings.METRICS_SLOW_REQUEST_SAMPLE_RATE
+        self.slow_request_max_queries = settings.METRICS_SLOW_REQUEST_MAX_QUERIES
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # Statements are only kept for requests that may end up in the slow log.
+        sampled = random.random() < self.slow_request_sample_rate
+        start = time.perf_counter()
+        with record_queries(self.slow_request_max_queries if sampled else 0) as queries:
+            response = self.get_response(request)
+        return self.finish(request, response, start, queries, sampled)
+
+    async def __acall__(self, request):
+        sampled = random.random() < self.slow_request_sample_rate
+        start = time.perf_counter()
+        with record_queries(self.slow_request_max_queries if sampled else 0) as queries:
+            response = await self.get_response(request)
+        return self.finish(request, response, start, queries, sampled)
+
+    def finish(self, request, response, start, queries, sampled):
+        def finished():
+            self.observe(request, response, time.perf_counter() - start, queries, sampled)
+
+        # Exports read their rows while the response is sent, so streamed
+        # requests are observed when the stream ends. Files are left alone:
+        # replacing their content would rule out wsgi.file_wrapper.
+        if not response.streaming or getattr(response, "file_to_stream", None) is not None:
+            finished()
+        elif response.is_async:
+            response.streaming_content = arecord_stream_queries(response.streaming_content, queries, finished)
+        else:
+            response.streaming_content = record_stream_queries(response.streaming_content, queries, finished)
+        return response
+
+    def observe(self, request, response, duration, queries, sampled):
+        # The route keeps the label set bounded, unlike the raw path.
+        match = request.resolver_match
+        view = match.route if match else "unmatched"
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(duration)
+        REQUEST_QUERIES.labels(view, request.method).observe(queries.count)
+        REQUEST_SQL_DURATION.labels(view, request.method).observe(queries.duration)
+        record_pool_stats()
+
+        if sampled and duration >= self.slow_request_seconds:
+            self.log_slow_request(request, response, duration, queries)
+
+    def log_slow_request(self, request, response, duration, queries):
+        statements = "\n".join(
+            f"  [{alias}] {seconds * 1000:.2f}ms {sql}" for alias, seconds, sql in queries.statements
+        )
+        logger.warning(
+            "slow_request method=%s path=%s status=%s duration_ms=%.2f queries=%d sql_ms=%.2f\n%s",
+            request.method,
+            request.path,
+            response.status_code,
+            duration * 1000,
+            queries.count,
+            queries.duration * 1000,
+            statements,
+        )
@@ -0,0 +1,116 @@
+import random
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_PIN_CACHE_KEY = "finance_core:primary_reads:{user_id}"
+
+_replica_reads = ContextVar("replica_reads", default=None)
+
+
+class ReplicaReads:
+    def __init__(self, alias):
+        self.alias = alias
+        self.wrote = False
+
+
+def read_database():
+    state = _replica_reads.get()
+    # Reads inside a transaction or after a write must see what was written.
+    if state is None or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return state.alias
+
+
+# Only reads made inside replica_reads() go to a replica; everything else,
+# writes included, stays on the primary.
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() is None:
+            return None
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        state = _replica_reads.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pin_key(user_id):
+    return PRIMARY_PIN_CACHE_KEY.format(user_id=user_id)
+
+
+def pin_to_primary(*user_ids):
+    # The caches keyed by debt version are refilled right after a change; a
+    # lagging replica would store rows older than the version they are under.
+    if settings.DB_READ_REPLICAS and user_ids:
+        cache.set_many({_pin_key(user_id): True for user_id in set(user_ids)}, settings.DB_REPLICA_PIN_SECONDS)
+
+
+@contextmanager
+def _replica_scope(pinned):
+    if pinned or not settings.DB_READ_REPLICAS:
+        yield
+        return
+
+    token = _replica_reads.set(ReplicaReads(random.choice(settings.DB_READ_REPLICAS)))
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def _primary_scope():
+    token = _replica_reads.set(None)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+# For caches keyed by a version read after replica_reads() checked the pin:
+# pin_to_primary() runs before the version moves, so checking again here
+# keeps a new version from being filled from a lagging replica.
+def primary_if_pinned(user_id):
+    if _replica_reads.get() is not None and cache.get(_pin_key(user_id)):
+        return _primary_scope()
+    return nullcontext()
+
+
+async def aprimary_if_pinned(user_id):
+    if _replica_reads.get() is not None and await cache.aget(_pin_key(user_id)):
+        return _primary_scope()
+    return nullcontext()
+
+
+# Decorates view methods, sync or async. Users whose debts just changed keep
+# reading from the primary for DB_REPLICA_PIN_SECONDS.
+def replica_reads(method):
+    if iscoroutinefunction(method):
+        @wraps(method)
+        async def inner(view, request, *args, **kwargs):
+            pinned = settings.DB_READ_REPLICAS and await cache.aget(_pin_key(request.user.id))
+            with _replica_scope(pinned):
+                return await method(view, request, *args, **kwargs)
+    else:
+        @wraps(method)
+        def inner(view, request, *args, **kwargs):
+            pinned = settings.DB_READ_REPLICAS and cache.get(_pin_key(request.user.id))
+            with _replica_scope(pinned):
+                return method(view, request, *args, **kwargs)
+
+    return inner
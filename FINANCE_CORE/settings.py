@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework.authtoken",
     "rest_framework",
     "corsheaders",
@@ -32,9 +33,11 @@ INSTALLED_APPS = [
     "django_celery_results",
     "authorizer",
     "bills",
+    "notifications",
 ]
 
 MIDDLEWARE = [
+    "FINANCE_CORE.middleware.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -65,6 +68,30 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "FINANCE_CORE.wsgi.application"
 
+# Every web and celery process keeps its own pool, so the total number of
+# connections is the max size times the number of processes.
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 2))
+
+# 0 turns pooling off in favour of persistent connections (DB_CONN_MAX_AGE).
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+
+# Seconds a request waits for a free connection before failing.
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+
+DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", 600))
+
+DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", 3600))
+
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+DB_POOL = {
+    "min_size": min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+    "max_size": DB_POOL_MAX_SIZE,
+    "timeout": DB_POOL_TIMEOUT,
+    "max_idle": DB_POOL_MAX_IDLE,
+    "max_lifetime": DB_POOL_MAX_LIFETIME,
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -73,7 +100,50 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASS"),
         "HOST": os.environ.get("DB_HOST"),
         "PORT": os.environ.get("DB_PORT"),
-        "OPTIONS": {"options": "-c timezone=America/Sao_Paulo"},
+        # Pooled connections run the startup options once, when the pool opens them.
+        "OPTIONS": {
+            "options": "-c timezone=America/Sao_Paulo",
+            **({"pool": DB_POOL} if DB_POOL_MAX_SIZE else {}),
+        },
+        # The pool requires CONN_MAX_AGE = 0 and checks every connection it
+        # hands out when health checks are on.
+        "CONN_MAX_AGE": 0 if DB_POOL_MAX_SIZE else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Comma-separated "host[:port][/name]" entries, one replica_<n> alias each;
+# the other connection settings are the primary's. Pointing an entry at the
+# primary itself is enough to try the routing locally.
+DB_REPLICAS = [replica for replica in os.environ.get("DB_REPLICAS", "").split(",") if replica]
+
+for index, replica in enumerate(DB_REPLICAS, 1):
+    location, _, replica_name = replica.partition("/")
+    replica_host, _, replica_port = location.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": replica_port or DATABASES["default"]["PORT"],
+        "NAME": replica_name or DATABASES["default"]["NAME"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+# 0 sends every read back to the primary while keeping the replica aliases.
+DB_REPLICA_READS = bool(int(os.environ.get("DB_REPLICA_READS", 1)))
+
+DB_READ_REPLICAS = [alias for alias in DATABASES if alias != "default"] if DB_REPLICA_READS else []
+
+# Seconds a user's reads stay on the primary after their debts change; keep
+# it above the replication lag.
+DB_REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", 10))
+
+DATABASE_ROUTERS = ["FINANCE_CORE.routers.ReplicaRouter"]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CACHE_REDIS_URL", "redis://redis:6379/1"),
     }
 }
 
@@ -82,12 +152,30 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "authorizer.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
 
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.environ.get("TOKEN_AUTH_CACHE_TIMEOUT", 300))
+
+TOKEN_AUTH_LOCAL_CACHE_TIMEOUT = int(os.environ.get("TOKEN_AUTH_LOCAL_CACHE_TIMEOUT", 5))
+
+TOKEN_AUTH_LOCAL_CACHE_SIZE = int(os.environ.get("TOKEN_AUTH_LOCAL_CACHE_SIZE", 10000))
+
+GOOGLE_HTTP_CONNECT_TIMEOUT = float(os.environ.get("GOOGLE_HTTP_CONNECT_TIMEOUT", 3.05))
+
+GOOGLE_HTTP_READ_TIMEOUT = float(os.environ.get("GOOGLE_HTTP_READ_TIMEOUT", 10))
+
+GOOGLE_HTTP_MAX_RETRIES = int(os.environ.get("GOOGLE_HTTP_MAX_RETRIES", 2))
+
+GOOGLE_HTTP_POOL_SIZE = int(os.environ.get("GOOGLE_HTTP_POOL_SIZE", 10))
+
+GOOGLE_JWKS_REFRESH_INTERVAL = int(os.environ.get("GOOGLE_JWKS_REFRESH_INTERVAL", 3600))
+
+GOOGLE_OAUTH2_JWKS_FILE = os.environ.get("GOOGLE_OAUTH2_JWKS_FILE")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.authorizer.password_validation.UserAttributeSimilarityValidator",
@@ -111,6 +199,29 @@ USE_I18N = True
 
 USE_TZ = True
 
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "FINANCE_CORE.metrics": {
+            "handlers": ["console"],
+            "level": os.environ.get("METRICS_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+METRICS_SLOW_REQUEST_MS = int(os.environ.get("METRICS_SLOW_REQUEST_MS", 500))
+
+METRICS_SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get("METRICS_SLOW_REQUEST_SAMPLE_RATE", 0.1))
+
+METRICS_SLOW_REQUEST_MAX_QUERIES = int(os.environ.get("METRICS_SLOW_REQUEST_MAX_QUERIES", 50))
+
+# When set, /metrics requires "Authorization: Bearer <token>".
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
 CORS_ORIGIN_ALLOW_ALL = True
 
 STATIC_URL = "static/"
@@ -133,15 +244,52 @@ EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
 
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 
+NOTIFICATIONS_OUTBOX_BATCH_SIZE = int(os.environ.get("NOTIFICATIONS_OUTBOX_BATCH_SIZE", 100))
+
+NOTIFICATIONS_OUTBOX_MAX_BATCHES = int(os.environ.get("NOTIFICATIONS_OUTBOX_MAX_BATCHES", 10))
+
+NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS", 5))
+
+NOTIFICATIONS_OUTBOX_RETRY_BACKOFF = int(os.environ.get("NOTIFICATIONS_OUTBOX_RETRY_BACKOFF", 60))
+
+DEBT_SYNC_PAGE_SIZE = int(os.environ.get("DEBT_SYNC_PAGE_SIZE", 500))
+
+DEBT_SYNC_LAG_SECONDS = int(os.environ.get("DEBT_SYNC_LAG_SECONDS", 30))
+
+DEBT_SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("DEBT_SYNC_TOMBSTONE_RETENTION_DAYS", 90))
+
+RECURRING_DEBTS_HORIZON_DAYS = int(os.environ.get("RECURRING_DEBTS_HORIZON_DAYS", 31))
+
 CELERY_IMPORTS = ("FINANCE_CORE.tasks",)
 
 CELERY_BROKER_URL = "redis://redis:6379/0"
 
 CELERY_RESULT_BACKEND = "redis://redis:6379/0"
 
+CELERY_TASK_ALWAYS_EAGER = bool(int(os.environ.get("CELERY_TASK_ALWAYS_EAGER", 0)))
+
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# crontab schedules follow local time, so the daily run lands on midnight here.
+CELERY_TIMEZONE = TIME_ZONE
+
 CELERY_BEAT_SCHEDULE = {
+    # Due dates are day-granular: debts only change state at midnight, the
+    # ones edited during the day are checked by check_due_debts.
     "check_pending_debts": {
         "task": "FINANCE_CORE.tasks.check_pending_debts",
+        "schedule": crontab(minute=0, hour=0),
+    },
+    "refresh_google_jwks": {
+        "task": "authorizer.tasks.refresh_google_jwks",
+        "schedule": crontab(minute=0),
+    },
+    "dispatch_outbox": {
+        "task": "notifications.tasks.dispatch_outbox",
         "schedule": crontab(minute="*/1"),
     },
+    "prune_debt_tombstones": {
+        "task": "bills.tasks.prune_debt_tombstones",
+        "schedule": crontab(minute=30, hour=3),
+    },
 }
@@ -1,52 +1,225 @@
-import os
+import hashlib
+from collections import defaultdict
 
 from celery import shared_task
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from django.core.mail import EmailMultiAlternatives
 from datetime import timedelta
 
-from bills.models import Debt
+from bills.models import Debt, RecurringDebt
+from bills.recurrence import expand_occurrences
+from bills.services import debts_changed
+from FINANCE_CORE.metrics import count_task_rows
+from notifications.models import OutboxEmail
+from notifications.services import enqueue_emails
 
+CHECK_PENDING_DEBTS_CHUNK_SIZE = 500
 
+
+def _pending_debts_filter(today, tomorrow):
+    overdue = Q(status=Debt.PENDING, due_date__lt=today)
+    due_soon = Q(status=Debt.PENDING, due_date=tomorrow, email_sent_for_due_soon=False)
+    return overdue | due_soon
+
+
+def _notification_key(debt):
+    if debt.id is None:
+        return f"{debt.recurrence_id}@{debt.occurrence_date.isoformat()}"
+    return str(debt.id)
+
+
+def _recurring_debts_filter(today, tomorrow):
+    yesterday = today - timedelta(days=1)
+    overdue_unchecked = Q(overdue_notified_through__isnull=True) | Q(overdue_notified_through__lt=yesterday)
+    due_soon_unchecked = Q(due_soon_notified_through__isnull=True) | Q(due_soon_notified_through__lt=tomorrow)
+    finished = Q(end_date__lt=F("overdue_notified_through"))
+    return (overdue_unchecked | due_soon_unchecked) & Q(start_date__lte=tomorrow) & ~finished
+
+
+def build_debt_notifications(overdue_debts, due_soon_debts):
+    overdue_by_user = defaultdict(list)
+    due_soon_by_user = defaultdict(list)
+    emails = {}
+
+    for debt in overdue_debts:
+        overdue_by_user[debt.user_id].append(debt)
+        emails[debt.user_id] = debt.user.email
+    for debt in due_soon_debts:
+        due_soon_by_user[debt.user_id].append(debt)
+        emails[debt.user_id] = debt.user.email
+
+    notifications = []
+    for user_id, email in emails.items():
+        lines = []
+        if overdue_by_user[user_id]:
+            lines.append("Seus débitos atrasados:")
+            lines.extend(f"- {debt}" for debt in overdue_by_user[user_id])
+        if due_soon_by_user[user_id]:
+            if lines:
+                lines.append("")
+            lines.append("Seus débitos que vencem amanhã:")
+            lines.extend(f"- {debt}" for debt in due_soon_by_user[user_id])
+
+        debt_keys = sorted(_notification_key(debt) for debt in overdue_by_user[user_id] + due_soon_by_user[user_id])
+        digest = hashlib.sha256(",".join(debt_keys).encode()).hexdigest()[:32]
+
+        notifications.append(
+            OutboxEmail(
+                subject="Débito atrasado!" if overdue_by_user[user_id] else "Débito quase atrasado!",
+                body="\n".join(lines),
+                to=email,
+                dedupe_key=f"pending-debts:{user_id}:{digest}",
+            )
+        )
+
+    return notifications
+
+
+def process_pending_debts(user_ids, today, tomorrow):
+    with transaction.atomic():
+        debts = list(
+            Debt.objects.filter(_pending_debts_filter(today, tomorrow), user_id__in=user_ids)
+            .select_related("user")
+            .only("title", "amount", "status", "due_date", "email_sent_for_due_soon", "user__email")
+            .select_for_update(skip_locked=True, of=("self",))
+        )
+        overdue_debts = [debt for debt in debts if debt.due_date < today]
+        due_soon_debts = [debt for debt in debts if debt.due_date == tomorrow]
+
+        now = timezone.now()
+        Debt.objects.filter(id__in=[debt.id for debt in overdue_debts]).update(status=Debt.OVERDUE, updated_at=now)
+        Debt.objects.filter(id__in=[debt.id for debt in due_soon_debts]).update(
+            email_sent_for_due_soon=True, updated_at=now
+        )
+        for debt in overdue_debts:
+            debt.status = Debt.OVERDUE
+
+        notifications = build_debt_notifications(overdue_debts, due_soon_debts)
+        enqueue_emails(notifications)
+
+        changed_user_ids = {debt.user_id for debt in debts}
+        transaction.on_commit(lambda: debts_changed(*changed_user_ids))
+
+    return len(overdue_debts), len(notifications)
+
+
+def process_recurring_debts(recurrence_ids, today, tomorrow):
+    with transaction.atomic():
+        recurrences = list(
+            RecurringDebt.objects.filter(_recurring_debts_filter(today, tomorrow), id__in=recurrence_ids)
+            .select_related("user")
+            .defer("search_vector")
+            .select_for_update(skip_locked=True, of=("self",))
+        )
+
+        # Earlier runs already went through the occurrences up to
+        # overdue_notified_through, so only the days since then are expanded.
+        starts = {
+            recurrence.id: min(recurrence.overdue_notified_through + timedelta(days=1), tomorrow)
+            for recurrence in recurrences
+            if recurrence.overdue_notified_through is not None
+        }
+
+        overdue_debts = []
+        due_soon_debts = []
+        for debt in expand_occurrences(recurrences, None, tomorrow, today, starts):
+            recurrence = debt.recurrence
+            debt.user = recurrence.user
+            if debt.due_date < today:
+                if recurrence.overdue_notified_through is None or debt.due_date > recurrence.overdue_notified_through:
+                    overdue_debts.append(debt)
+            elif debt.due_date == tomorrow:
+                if recurrence.due_soon_notified_through is None or recurrence.due_soon_notified_through < tomorrow:
+                    due_soon_debts.append(debt)
+
+        RecurringDebt.objects.filter(id__in=[recurrence.id for recurrence in recurrences]).update(
+            overdue_notified_through=today - timedelta(days=1), due_soon_notified_through=tomorrow
+        )
+
+        notifications = build_debt_notifications(overdue_debts, due_soon_debts)
+        enqueue_emails(notifications)
+
+        # Occurrences become overdue without any row changing.
+        changed_user_ids = {debt.user_id for debt in overdue_debts}
+        transaction.on_commit(lambda: debts_changed(*changed_user_ids))
+
+    return len(overdue_debts), len(notifications)
+
+
+def check_recurring_debts(today, tomorrow, chunk_size):
+    overdue_count = notified_count = 0
+    last_id = 0
+
+    while True:
+        recurrence_ids = list(
+            RecurringDebt.objects.filter(_recurring_debts_filter(today, tomorrow), id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not recurrence_ids:
+            break
+
+        overdue, notified = process_recurring_debts(recurrence_ids, today, tomorrow)
+        overdue_count += overdue
+        notified_count += notified
+        last_id = recurrence_ids[-1]
+
+        if len(recurrence_ids) < chunk_size:
+            break
+
+    return overdue_count, notified_count
+
+
+# Runs once a day at local midnight, when debts cross into overdue and due
+# soon; debts changed during the day go through check_due_debts instead.
 @shared_task
-def check_pending_debts():
-    today = timezone.now().date()
+def check_pending_debts(chunk_size=CHECK_PENDING_DEBTS_CHUNK_SIZE):
+    today = timezone.localdate()
     tomorrow = today + timedelta(days=1)
 
-    overdue_debts = Debt.objects.filter(status=Debt.PENDING, due_date__lt=today)
-    overdue_debts.update(status=Debt.OVERDUE)
+    overdue_count = notified_count = user_count = 0
+    last_user_id = 0
 
-    for debt in overdue_debts:
-        subject = f"Débito atrasado!"
-        from_email = os.environ.get("EMAIL_HOST_USER")
-        recipient_list = [debt.user.email]
-
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=f"Seu débito: {debt.__str__()} está atrasado!",
-            from_email=from_email,
-            to=recipient_list,
-            reply_to=[from_email],
+    while True:
+        user_ids = list(
+            Debt.objects.filter(_pending_debts_filter(today, tomorrow), user_id__gt=last_user_id)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)
+            .distinct()[:chunk_size]
         )
-        email.send()
-
-    almost_due_debts = Debt.objects.filter(status=Debt.PENDING, due_date=tomorrow)
-
-    for debt in almost_due_debts:
-        if not debt.email_sent_for_due_soon:
-            subject = f"Débito quase atrasado!"
-            from_email = os.environ.get("EMAIL_HOST_USER")
-            recipient_list = [debt.user.email]
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=f"Seu débito: {debt.__str__()} está para atrasar amanhã!",
-                from_email=from_email,
-                to=recipient_list,
-                reply_to=[from_email],
-            )
-            email.send()
-            debt.email_sent_for_due_soon = True
-            debt.save()
+        if not user_ids:
+            break
+
+        overdue, notified = process_pending_debts(user_ids, today, tomorrow)
+        overdue_count += overdue
+        notified_count += notified
+        user_count += len(user_ids)
+        last_user_id = user_ids[-1]
+
+        if len(user_ids) < chunk_size:
+            break
+
+    overdue, notified = check_recurring_debts(today, tomorrow, chunk_size)
+    overdue_count += overdue
+    notified_count += notified
+
+    count_task_rows("check_pending_debts", overdue=overdue_count, notified=notified_count, users=user_count)
+    return f"{overdue_count} debts marked as overdue and {notified_count} users notified."
+
+
+@shared_task
+def check_due_debts(user_ids=(), recurrence_ids=()):
+    today = timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+
+    overdue_count = notified_count = 0
+    if user_ids:
+        overdue_count, notified_count = process_pending_debts(user_ids, today, tomorrow)
+    if recurrence_ids:
+        overdue, notified = process_recurring_debts(recurrence_ids, today, tomorrow)
+        overdue_count += overdue
+        notified_count += notified
 
-    return f"{overdue_debts.count()} debts marked as overdue and {almost_due_debts.count()} users notified."
+    count_task_rows("check_due_debts", overdue=overdue_count, notified=notified_count)
+    return f"{overdue_count} debts marked as overdue and {notified_count} users notified."
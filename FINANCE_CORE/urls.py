@@ -2,7 +2,10 @@ from django.urls import include, path
 
 from swagger_config import schema_view
 
+from .views import metrics
+
 urlpatterns = [
+    path("metrics", metrics, name="metrics"),
     path("api/authorizer/", include("authorizer.urls")),
     path("api/bills/", include("bills.urls")),
     path(
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from .metrics import export_metrics
+
+
+@require_GET
+def metrics(request):
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponseForbidden()
+
+    return HttpResponse(export_metrics(), content_type=CONTENT_TYPE_LATEST)
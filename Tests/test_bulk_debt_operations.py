@@ -0,0 +1,38 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from bills.models import Category, Debt, DebtTombstone, RecurringDebt, SkippedOccurrence
+from bills.services import apply_bulk_debt_operations
+
+
+@pytest.fixture
+def user(db):
+    cache.clear()
+    Category.objects.create(id=9, name="Outros")
+    return User.objects.create_user(username="bulk-user", password="secret")
+
+
+def test_bulk_delete_writes_tombstones_in_one_query(user, django_assert_num_queries):
+    recurrence = RecurringDebt.objects.create(user=user, title="Rent", amount="100.00", start_date=date(2026, 1, 5))
+    debts = Debt.objects.bulk_create(
+        [Debt(user=user, title=f"Debt {n}", amount="10.00", due_date=date(2026, 1, 1)) for n in range(200)]
+        + [Debt(user=user, title="Rent", amount="100.00", due_date=date(2026, 1, 5), recurrence=recurrence,
+                occurrence_date=date(2026, 1, 5))]
+    )
+    operations = [{"op": "delete", "id": debt.id} for debt in debts]
+
+    # Looking the debts up, the savepoint and its release, the DELETE and one
+    # INSERT each for the tombstones and the skipped occurrence.
+    with django_assert_num_queries(6):
+        results, applied = apply_bulk_debt_operations(user, operations)
+
+    assert applied
+    assert {result["status"] for result in results} == {"deleted"}
+    assert not Debt.objects.filter(user=user).exists()
+    assert set(DebtTombstone.objects.filter(user=user).values_list("debt_id", flat=True)) == {
+        debt.id for debt in debts
+    }
+    assert SkippedOccurrence.objects.filter(recurrence=recurrence, occurrence_date=date(2026, 1, 5)).exists()
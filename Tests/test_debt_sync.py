@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from bills.models import Category, Debt
+from bills.sync import DEBT_SYNC_LAG, get_debt_changes
+
+
+@pytest.fixture
+def user(db):
+    Category.objects.create(id=9, name="Outros")
+    return User.objects.create_user(username="sync-user", password="secret")
+
+
+def create_debt(user, updated_at):
+    debt = Debt.objects.create(user=user, title="Debt", amount="10.00", due_date=date(2026, 1, 1))
+    Debt.objects.filter(id=debt.id).update(updated_at=updated_at)
+    return debt.id
+
+
+def sync(user, token, now):
+    with mock.patch("bills.sync.timezone.now", return_value=now):
+        debts, _, token, has_more = get_debt_changes(user, token, page_size=1)
+    return [debt.id for debt in debts], token, has_more
+
+
+def test_cursor_does_not_skip_late_commits(user):
+    now = timezone.now()
+    synced = []
+    # Two rows stamped inside the lag: their transactions may not be the last to commit.
+    for updated_at in [now - 2 * DEBT_SYNC_LAG, now - DEBT_SYNC_LAG / 3, now - DEBT_SYNC_LAG / 4]:
+        synced.append(create_debt(user, updated_at))
+
+    received, token, has_more = sync(user, None, now)
+    assert received == synced[:1]
+    assert not has_more
+
+    # A transaction stamped before the newest rows commits after that sync.
+    synced.append(create_debt(user, now - DEBT_SYNC_LAG / 2))
+
+    later = now + DEBT_SYNC_LAG
+    has_more = True
+    while has_more:
+        ids, token, has_more = sync(user, token, later)
+        received.extend(ids)
+
+    assert sorted(received) == sorted(synced)
+
+
+def test_caught_up_cursor_moves_to_the_horizon(user):
+    now = timezone.now()
+    create_debt(user, now - timedelta(days=1))
+
+    _, token, _ = sync(user, None, now)
+    _, token, _ = sync(user, token, now + timedelta(days=60))
+
+    # The deletion cursor kept moving, so a client syncing regularly never expires.
+    received, _, has_more = sync(user, token, now + timedelta(days=120))
+    assert received == []
+    assert not has_more
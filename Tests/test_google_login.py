@@ -0,0 +1,70 @@
+from unittest import mock
+
+import httpx
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from authorizer import services
+from authorizer.services import GoogleAccessTokens
+
+TOKENS = {"id_token": "id-token", "access_token": "access-token"}
+STATE = "state"
+
+
+@pytest.fixture(autouse=True)
+def google(monkeypatch):
+    for name in ("GOOGLE_OAUTH2_CLIENT_ID", "GOOGLE_OAUTH2_CLIENT_SECRET", "GOOGLE_OAUTH2_PROJECT_ID"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setattr(GoogleAccessTokens, "decode_id_token", lambda self: {"email": "google@example.com"})
+
+
+@pytest.mark.django_db
+def test_asgi_logins_reuse_the_async_client(monkeypatch):
+    built = []
+    token_requests = []
+
+    def token_endpoint(request):
+        token_requests.append(request)
+        return httpx.Response(200, json=TOKENS)
+
+    def build_async_http_client():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(token_endpoint))
+        built.append(client)
+        return client
+
+    monkeypatch.setattr(services, "build_async_http_client", build_async_http_client)
+
+    async def log_in_twice():
+        client = AsyncClient()
+        status_codes = []
+        for _ in range(2):
+            session = await client.asession()
+            await session.aset("google_oauth2_state", STATE)
+            await session.asave()
+            response = await client.get(reverse("user:google-login"), {"code": "code", "state": STATE})
+            status_codes.append(response.status_code)
+        return status_codes
+
+    assert async_to_sync(log_in_twice)() == [302, 302]
+    assert len(token_requests) == 2
+    assert len(built) == 1
+
+
+@pytest.mark.django_db
+def test_wsgi_logins_use_the_pooled_session(monkeypatch):
+    response = mock.Mock(status_code=200)
+    response.json.return_value = TOKENS
+    post = mock.Mock(return_value=response)
+    monkeypatch.setattr(services.http_session, "post", post)
+    monkeypatch.setattr(services, "build_async_http_client", mock.Mock(side_effect=AssertionError))
+
+    client = Client()
+    for _ in range(2):
+        session = client.session
+        session["google_oauth2_state"] = STATE
+        session.save()
+        assert client.get(reverse("user:google-login"), {"code": "code", "state": STATE}).status_code == 302
+
+    assert post.call_count == 2
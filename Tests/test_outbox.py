@@ -0,0 +1,95 @@
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+
+import pytest
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from notifications.models import OutboxEmail
+from notifications.tasks import dispatch_outbox
+
+server = {}
+
+
+class DroppingBackend(BaseEmailBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connected = False
+
+    def open(self):
+        if server["opens"] and server["down_after_drop"] and server["dropped"]:
+            raise ConnectionRefusedError("Connection refused")
+        server["opens"] += 1
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def send_messages(self, messages):
+        if not self.connected:
+            raise SMTPServerDisconnected("please run connect() first")
+        for message in messages:
+            server["calls"] += 1
+            if server["calls"] == server["drop_at"]:
+                server["dropped"] = True
+                self.connected = False
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+            recipient = message.to[0]
+            if recipient.startswith("refused"):
+                raise SMTPRecipientsRefused({recipient: (550, b"No such user")})
+            server["sent"].append(recipient)
+        return len(messages)
+
+
+@pytest.fixture(autouse=True)
+def smtp(settings):
+    settings.EMAIL_BACKEND = f"{__name__}.DroppingBackend"
+    server.update(opens=0, calls=0, drop_at=None, dropped=False, down_after_drop=False, sent=[])
+
+
+def enqueue(*recipients):
+    now = timezone.now() - timedelta(minutes=1)
+    OutboxEmail.objects.bulk_create([
+        OutboxEmail(subject="Subject", body="Body", to=to, available_at=now + timedelta(seconds=index))
+        for index, to in enumerate(recipients)
+    ])
+
+
+def outbox():
+    return {email.to: email for email in OutboxEmail.objects.all()}
+
+
+@pytest.mark.django_db
+def test_connection_dropped_mid_batch_is_reopened():
+    enqueue("a@example.com", "b@example.com", "c@example.com", "d@example.com")
+    server["drop_at"] = 3
+
+    assert dispatch_outbox() == "4 emails sent and 0 failed."
+    assert server["opens"] == 2
+    assert all(email.status == OutboxEmail.SENT and email.attempts == 0 for email in outbox().values())
+
+
+@pytest.mark.django_db
+def test_server_down_leaves_unsent_emails_untouched():
+    enqueue("a@example.com", "b@example.com", "c@example.com", "d@example.com")
+    server.update(drop_at=3, down_after_drop=True)
+
+    assert dispatch_outbox(batch_size=2) == "2 emails sent and 0 failed."
+    emails = outbox()
+    assert [emails[to].status for to in ("a@example.com", "b@example.com")] == [OutboxEmail.SENT] * 2
+    for to in ("c@example.com", "d@example.com"):
+        assert emails[to].status == OutboxEmail.PENDING
+        assert emails[to].attempts == 0
+        assert emails[to].last_error is None
+
+
+@pytest.mark.django_db
+def test_refused_recipient_counts_an_attempt():
+    enqueue("a@example.com", "refused@example.com", "c@example.com")
+
+    assert dispatch_outbox() == "2 emails sent and 1 failed."
+    refused = outbox()["refused@example.com"]
+    assert refused.status == OutboxEmail.PENDING
+    assert refused.attempts == 1
+    assert server["sent"] == ["a@example.com", "c@example.com"]
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bills.models import Category, Debt, RecurringDebt
+from bills.recurrence import user_occurrences
+
+
+@pytest.fixture
+def user(db):
+    cache.clear()
+    Category.objects.create(id=9, name="Outros")
+    return User.objects.create_user(username="recurring-user", password="secret")
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def recurrence(user):
+    today = timezone.localdate()
+    return RecurringDebt.objects.create(
+        user=user, title="Rent", amount="100.00", start_date=date(today.year - 1, today.month, 1), count=6
+    )
+
+
+def occurrence_dates(user):
+    return [debt.occurrence_date for debt in user_occurrences(user.id, timezone.localdate())]
+
+
+def occurrences_url(recurrence):
+    return f"/api/bills/recurring-debts/{recurrence.id}/occurrences/"
+
+
+def test_a_deleted_occurrence_does_not_come_back(user, client, recurrence):
+    first, second = occurrence_dates(user)[:2]
+    response = client.post(occurrences_url(recurrence), {"occurrence_date": first, "status": Debt.PAID})
+    assert response.status_code == 201
+
+    assert client.delete(f"/api/bills/debts/{response.data['id']}/").status_code == 204
+
+    assert occurrence_dates(user)[0] == second
+
+
+def test_skipping_an_occurrence_that_was_never_materialized(user, client, recurrence):
+    first, second = occurrence_dates(user)[:2]
+
+    response = client.delete(occurrences_url(recurrence), QUERY_STRING=f"occurrence_date={first}")
+    assert response.status_code == 204
+    assert occurrence_dates(user)[0] == second
+
+    response = client.post(occurrences_url(recurrence), {"occurrence_date": first, "status": Debt.PAID})
+    assert response.status_code == 201
+    assert not Debt.objects.get(id=response.data["id"]).recurrence.skipped_occurrences.exists()
+
+
+def test_skipping_a_date_outside_the_schedule(client, recurrence):
+    not_an_occurrence = recurrence.start_date + timedelta(days=1)
+    response = client.delete(occurrences_url(recurrence), QUERY_STRING=f"occurrence_date={not_an_occurrence}")
+    assert response.status_code == 400
+
+
+def test_schedule_changes_reset_the_notified_markers(client, recurrence):
+    RecurringDebt.objects.filter(id=recurrence.id).update(
+        overdue_notified_through=recurrence.start_date, due_soon_notified_through=recurrence.start_date
+    )
+    url = f"/api/bills/recurring-debts/{recurrence.id}/"
+
+    assert client.patch(url, {"title": "Rent and fees"}).status_code == 200
+    recurrence.refresh_from_db()
+    assert recurrence.overdue_notified_through == recurrence.start_date
+
+    assert client.patch(url, {"day_of_month": 10}).status_code == 200
+    recurrence.refresh_from_db()
+    assert recurrence.overdue_notified_through is None
+    assert recurrence.due_soon_notified_through is None
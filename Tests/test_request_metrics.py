@@ -0,0 +1,57 @@
+from datetime import date
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, Client
+from rest_framework.authtoken.models import Token
+
+from bills.models import Category, Debt
+from FINANCE_CORE.middleware import RequestMetricsMiddleware
+
+EXPORT_URL = "/api/bills/debts/export/"
+
+
+@pytest.fixture
+def token(db, settings):
+    settings.METRICS_SLOW_REQUEST_SAMPLE_RATE = 1
+    cache.clear()
+    Category.objects.create(id=9, name="Outros")
+    user = User.objects.create_user(username="export-user", password="secret")
+    Debt.objects.create(user=user, title="Rent", amount="100.00", due_date=date(2026, 1, 5))
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def observed():
+    with mock.patch.object(RequestMetricsMiddleware, "observe", autospec=True) as observe:
+        yield observe
+
+
+def recorded_sql(observe):
+    _, _, _, _, queries, _ = observe.call_args.args
+    return [sql for _, _, sql in queries.statements]
+
+
+def test_streamed_export_queries_are_recorded(token, observed):
+    response = Client().get(EXPORT_URL, HTTP_AUTHORIZATION=f"Token {token.key}")
+    assert not observed.called
+
+    content = b"".join(response.streaming_content)
+
+    assert b"Rent" in content
+    assert observed.call_count == 1
+    assert any('FROM "bills_debt"' in sql for sql in recorded_sql(observed))
+
+
+def test_async_streamed_export_queries_are_recorded(token, observed):
+    async def export():
+        response = await AsyncClient().get(EXPORT_URL, headers={"Authorization": f"Token {token.key}"})
+        assert not observed.called
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    assert b"Rent" in async_to_sync(export)()
+    assert observed.call_count == 1
+    assert any('FROM "bills_debt"' in sql for sql in recorded_sql(observed))
@@ -0,0 +1,19 @@
+from FINANCE_CORE.settings import *  # noqa: F401,F403
+
+# Tests only need the local Postgres configured by the DB_* variables: the
+# cache is in-process, Celery runs eagerly and emails stay in memory.
+DEBUG = False
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+CELERY_TASK_ALWAYS_EAGER = True
+
+CELERY_BROKER_URL = "memory://"
+
+CELERY_RESULT_BACKEND = "cache+memory://"
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
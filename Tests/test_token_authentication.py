@@ -0,0 +1,69 @@
+import time
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from authorizer.authentication import (
+    CachedTokenAuthentication,
+    invalidate_tokens,
+    invalidate_user_tokens,
+    local_token_cache,
+    token_generation_key,
+)
+
+
+@pytest.fixture
+def token(db):
+    cache.clear()
+    local_token_cache.clear()
+    user = User.objects.create_user(username="token-user", password="secret")
+    return Token.objects.create(user=user)
+
+
+def authenticate(key):
+    return CachedTokenAuthentication().authenticate_credentials(key)
+
+
+def test_credentials_are_served_from_cache(token, django_assert_num_queries):
+    authenticate(token.key)
+    with django_assert_num_queries(0):
+        assert authenticate(token.key)[0] == token.user
+
+
+def test_invalidation_during_a_miss_is_not_overwritten(token):
+    database_read = TokenAuthentication.authenticate_credentials
+
+    def revoked_while_reading(self, key):
+        credentials = database_read(self, key)
+        invalidate_tokens(key)
+        return credentials
+
+    with mock.patch.object(TokenAuthentication, "authenticate_credentials", revoked_while_reading):
+        authenticate(token.key)
+
+    with mock.patch.object(TokenAuthentication, "authenticate_credentials", autospec=True) as database_read:
+        database_read.return_value = (token.user, token)
+        authenticate(token.key)
+    database_read.assert_called_once()
+
+
+def test_generation_moved_by_another_process_retires_local_entry(token, django_assert_num_queries):
+    authenticate(token.key)
+    # Another worker invalidated the token: this process' local cache still holds it.
+    cache.set(token_generation_key(token.key), time.time_ns(), None)
+    with django_assert_num_queries(1):
+        authenticate(token.key)
+
+
+def test_bulk_deactivation_revokes_cached_tokens(token):
+    authenticate(token.key)
+    User.objects.filter(pk=token.user_id).update(is_active=False)
+    invalidate_user_tokens(token.user_id)
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(token.key)
@@ -0,0 +1,115 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_CACHE_KEY = "authorizer:token:{digest}"
+TOKEN_GENERATION_CACHE_KEY = "authorizer:token_generation:{digest}"
+
+
+class LocalTTLCache:
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return pickle.loads(value)
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.timeout <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, pickle.dumps(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTTLCache(
+    maxsize=settings.TOKEN_AUTH_LOCAL_CACHE_SIZE,
+    timeout=settings.TOKEN_AUTH_LOCAL_CACHE_TIMEOUT,
+)
+
+
+def _token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_cache_key(key):
+    return TOKEN_CACHE_KEY.format(digest=_token_digest(key))
+
+
+def token_generation_key(key):
+    return TOKEN_GENERATION_CACHE_KEY.format(digest=_token_digest(key))
+
+
+def _new_generation(generation_key):
+    # Unknown generations start from "now", so entries stored under an
+    # evicted one are never taken for current.
+    cache.add(generation_key, time.time_ns(), None)
+    return cache.get(generation_key)
+
+
+# Cached credentials carry the generation they were read under. Moving the
+# generation retires them everywhere, including the local caches of other
+# processes and entries written by requests that read the token just before
+# it changed.
+def invalidate_tokens(*keys):
+    if keys:
+        cache.set_many({token_generation_key(key): time.time_ns() for key in keys}, None)
+        cache_keys = [token_cache_key(key) for key in keys]
+        local_token_cache.delete_many(cache_keys)
+        cache.delete_many(cache_keys)
+
+
+def invalidate_user_tokens(*user_ids):
+    from rest_framework.authtoken.models import Token
+
+    invalidate_tokens(*Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        generation_key = token_generation_key(key)
+
+        entry = local_token_cache.get(cache_key)
+        if entry is not None and cache.get(generation_key) == entry[0]:
+            return entry[1]
+
+        cached = cache.get_many([generation_key, cache_key])
+        generation = cached.get(generation_key) or _new_generation(generation_key)
+        entry = cached.get(cache_key)
+        if entry is None or entry[0] != generation:
+            # The generation is read first: if the token changes while it is
+            # being read, the entry below is already stale when stored.
+            entry = (generation, super().authenticate_credentials(key))
+            cache.set(cache_key, entry, settings.TOKEN_AUTH_CACHE_TIMEOUT)
+
+        local_token_cache.set(cache_key, entry)
+        return entry[1]
@@ -1,13 +1,137 @@
 import os
+import json
+import asyncio
+import threading
+import time
+import weakref
 from random import SystemRandom
 from urllib.parse import urlencode
 
 import jwt
 import string
 import secrets
+import httpx
 import requests
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from oauthlib.common import UNICODE_ASCII_CHARACTER_SET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_JWKS_CACHE_KEY = "authorizer:google_jwks"
+GOOGLE_ID_TOKEN_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+
+
+def build_http_session() -> requests.Session:
+    retries = Retry(
+        total=settings.GOOGLE_HTTP_MAX_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.GOOGLE_HTTP_POOL_SIZE,
+        pool_maxsize=settings.GOOGLE_HTTP_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+http_session = build_http_session()
+
+
+def http_timeout():
+    return settings.GOOGLE_HTTP_CONNECT_TIMEOUT, settings.GOOGLE_HTTP_READ_TIMEOUT
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    # httpx only retries failed connections, the same as urllib3 does for the
+    # POST to the token endpoint.
+    transport = httpx.AsyncHTTPTransport(
+        retries=settings.GOOGLE_HTTP_MAX_RETRIES,
+        limits=httpx.Limits(
+            max_connections=settings.GOOGLE_HTTP_POOL_SIZE,
+            max_keepalive_connections=settings.GOOGLE_HTTP_POOL_SIZE,
+        ),
+    )
+    timeout = httpx.Timeout(settings.GOOGLE_HTTP_READ_TIMEOUT, connect=settings.GOOGLE_HTTP_CONNECT_TIMEOUT)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+# Pooled connections belong to the event loop that opened them, so each loop
+# gets its own client, in practice one per ASGI worker; under WSGI the views
+# use http_session instead. Each client is held by an async generator, which
+# the loop closes when it shuts down (asyncio.run() does so on exit), and that
+# closes the client with it.
+_async_http_clients = weakref.WeakKeyDictionary()
+
+
+async def _loop_http_client():
+    client = build_async_http_client()
+    try:
+        yield client
+    finally:
+        # The generator keeps a reference to its loop, drop it with the loop.
+        _async_http_clients.pop(asyncio.get_running_loop(), None)
+        await client.aclose()
+
+
+async def async_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    if loop not in _async_http_clients:
+        holder = _loop_http_client()
+        _async_http_clients[loop] = (holder, await anext(holder))
+    return _async_http_clients[loop][1]
+
+
+def fetch_google_jwks() -> dict:
+    if settings.GOOGLE_OAUTH2_JWKS_FILE:
+        with open(settings.GOOGLE_OAUTH2_JWKS_FILE) as jwks_file:
+            return json.load(jwks_file)
+
+    response = http_session.get(GOOGLE_JWKS_URL, timeout=http_timeout())
+    response.raise_for_status()
+    jwks = response.json()
+    cache.set(GOOGLE_JWKS_CACHE_KEY, jwks, settings.GOOGLE_JWKS_REFRESH_INTERVAL * 2)
+    return jwks
+
+
+class GoogleJwksKeySet:
+    MIN_REFRESH_INTERVAL = 60
+
+    def __init__(self):
+        self._keys = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self, force=False):
+        use_cache = not force and not settings.GOOGLE_OAUTH2_JWKS_FILE
+        jwks = cache.get(GOOGLE_JWKS_CACHE_KEY) if use_cache else None
+        if jwks is None:
+            jwks = fetch_google_jwks()
+        self._keys = {key.key_id: key for key in jwt.PyJWKSet.from_dict(jwks).keys}
+        self._loaded_at = time.monotonic()
+
+    def get_signing_key(self, kid):
+        with self._lock:
+            age = None if self._loaded_at is None else time.monotonic() - self._loaded_at
+            if age is None or age > settings.GOOGLE_JWKS_REFRESH_INTERVAL:
+                self._load()
+            elif kid not in self._keys and age > self.MIN_REFRESH_INTERVAL:
+                self._load(force=True)
+
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown ID token signing key.")
+        return key.key
+
+
+google_jwks = GoogleJwksKeySet()
 
 
 class GoogleRawLoginCredentials:
@@ -18,13 +142,22 @@ class GoogleRawLoginCredentials:
 
 
 class GoogleAccessTokens:
-    def __init__(self, id_token: str, access_token: str):
+    def __init__(self, id_token: str, access_token: str, client_id: str = None):
         self.id_token = id_token
         self.access_token = access_token
+        self.client_id = client_id
 
     def decode_id_token(self) -> [str, str]:
         id_token = self.id_token
-        decoded_token = jwt.decode(jwt=id_token, options={"verify_signature": False})
+        header = jwt.get_unverified_header(id_token)
+        signing_key = google_jwks.get_signing_key(header.get("kid"))
+        decoded_token = jwt.decode(
+            jwt=id_token,
+            key=signing_key,
+            algorithms=["RS256"],
+            audience=self.client_id,
+            issuer=GOOGLE_ID_TOKEN_ISSUERS,
+        )
         return decoded_token
 
 
@@ -72,25 +205,36 @@ class GoogleRawLoginFlowService:
     def _get_redirect_uri(self):
         return "http://15.228.233.134/api/authorizer/google-login/"
 
-    def get_tokens(self, *, code: str) -> GoogleAccessTokens:
-        redirect_uri = self._get_redirect_uri()
-
-        data = {
+    def _get_tokens_data(self, code: str) -> dict:
+        return {
             "code": code,
             "client_id": self._credentials.client_id,
             "client_secret": self._credentials.client_secret,
-            "redirect_uri": redirect_uri,
+            "redirect_uri": self._get_redirect_uri(),
             "grant_type": "authorization_code",
         }
 
-        response = requests.post(self.GOOGLE_ACCESS_TOKEN_OBTAIN_URL, data=data)
+    def _build_tokens(self, tokens: dict) -> GoogleAccessTokens:
+        return GoogleAccessTokens(
+            id_token=tokens["id_token"],
+            access_token=tokens["access_token"],
+            client_id=self._credentials.client_id,
+        )
 
-        tokens = response.json()
-        google_tokens = GoogleAccessTokens(
-            id_token=tokens["id_token"], access_token=tokens["access_token"]
+    def get_tokens(self, *, code: str) -> GoogleAccessTokens:
+        response = http_session.post(
+            self.GOOGLE_ACCESS_TOKEN_OBTAIN_URL, data=self._get_tokens_data(code), timeout=http_timeout()
         )
+        response.raise_for_status()
+
+        return self._build_tokens(response.json())
+
+    async def aget_tokens(self, *, code: str) -> GoogleAccessTokens:
+        client = await async_http_client()
+        response = await client.post(self.GOOGLE_ACCESS_TOKEN_OBTAIN_URL, data=self._get_tokens_data(code))
+        response.raise_for_status()
 
-        return google_tokens
+        return self._build_tokens(response.json())
 
     def get_authorization_url(self):
         redirect_uri = self._get_redirect_uri()
@@ -116,9 +260,12 @@ class GoogleRawLoginFlowService:
     def get_user_info(self, *, google_tokens: GoogleAccessTokens):
         access_token = google_tokens.access_token
 
-        response = requests.get(
-            self.GOOGLE_USER_INFO_URL, params={"access_token": access_token}
+        response = http_session.get(
+            self.GOOGLE_USER_INFO_URL,
+            params={"access_token": access_token},
+            timeout=http_timeout(),
         )
+        response.raise_for_status()
 
         return response.json()
 
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_tokens(key))
+
+
+# QuerySet.update() and bulk_update() send no post_save: code changing users
+# that way, such as deactivating them in bulk, calls invalidate_user_tokens().
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields == frozenset(['last_login']):
+        return
+
+    keys = list(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+    transaction.on_commit(lambda: invalidate_tokens(*keys))
@@ -0,0 +1,93 @@
+from celery import shared_task
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.db import DatabaseError, transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.html import strip_tags
+from django.utils.http import urlsafe_base64_encode
+
+from FINANCE_CORE.metrics import timed
+from notifications.services import enqueue_email
+
+from .services import fetch_google_jwks
+
+EMAIL_TASK_OPTIONS = {
+    "autoretry_for": (DatabaseError,),
+    "retry_backoff": True,
+    "retry_backoff_max": 600,
+    "retry_kwargs": {"max_retries": 5},
+}
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+@timed("task.registration_email")
+def send_registration_email(user_id):
+    user = User.objects.get(pk=user_id)
+    context = {'user': user.username}
+    email_html = render_to_string("register.html", context)
+
+    enqueue_email(
+        subject="Bem Vindo(a)!",
+        body=strip_tags(email_html),
+        html_body=email_html,
+        to=user.email,
+        dedupe_key=f"register:{user.pk}",
+    )
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+@timed("task.google_registration_email")
+def send_google_registration_email(user_id):
+    user = User.objects.get(pk=user_id)
+    context = {"user": user}
+    email_html = render_to_string("register.html", context)
+
+    enqueue_email(
+        subject="Cadastro realizado com sucesso!",
+        body=strip_tags(email_html),
+        html_body=email_html,
+        to=user.email,
+        dedupe_key=f"google-register:{user.pk}",
+    )
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+@timed("task.password_reset_email")
+def send_password_reset_email(user_id, protocol, domain):
+    user = User.objects.get(pk=user_id)
+    token = default_token_generator.make_token(user)
+    user.password_reset_token = token
+
+    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+    reset_url = reverse(
+        "user:confirm_password_reset",
+        kwargs={
+            "uidb64": uidb64,
+            "token": token,
+        },
+    )
+
+    context = {
+        "user": user,
+        "protocol": protocol,
+        "domain": domain,
+        "reset_url": reset_url,
+    }
+    email_html = render_to_string("password_reset.html", context)
+
+    with transaction.atomic():
+        user.save()
+        enqueue_email(
+            subject="Alterar Senha",
+            body=strip_tags(email_html),
+            html_body=email_html,
+            to=user.email,
+            dedupe_key=f"password-reset:{user.pk}:{token}",
+        )
+
+
+@shared_task
+def refresh_google_jwks():
+    fetch_google_jwks()
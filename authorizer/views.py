@@ -1,19 +1,22 @@
 import os
 import json
 
+import httpx
+import jwt
+import requests
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import EmailMultiAlternatives
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.template.loader import render_to_string
-from django.urls import reverse
-from django.utils.encoding import force_bytes
-from django.utils.html import strip_tags
-from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.decorators import method_decorator
+from django.utils.http import urlsafe_base64_decode
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import serializers, status
 from rest_framework.authtoken.models import Token
@@ -21,55 +24,24 @@ from rest_framework.exceptions import ValidationError, AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from FINANCE_CORE.metrics import timed
+
 from .serializers import RegistrationSerializer, LoginSerializer
+from .tasks import send_google_registration_email, send_password_reset_email, send_registration_email
 from .services import GoogleRawLoginFlowService, generate_secure_password
 
 
 @csrf_exempt
+@timed("password_reset")
 def password_reset(request):
     if request.method == "POST":
         data = json.loads(request.body)
         email = data.get("email")
         if email:
             user = get_object_or_404(User, email=email)
-            token = default_token_generator.make_token(user)
-            user.password_reset_token = token
-            user.save()
-
             protocol = "https" if request.is_secure() else "http"
             domain = request.META["HTTP_HOST"]
-            uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-            reset_url = reverse(
-                "user:confirm_password_reset",
-                kwargs={
-                    "uidb64": uidb64,
-                    "token": token,
-                },
-            )
-
-            context = {
-                "user": user,
-                "protocol": protocol,
-                "domain": domain,
-                "reset_url": reset_url,
-            }
-            email_html = render_to_string("password_reset.html", context)
-            email_text = strip_tags(email_html)
-
-            subject = "Alterar Senha"
-            from_email = os.environ.get("EMAIL_HOST_USER")
-            recipient_list = [email]
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=email_text,
-                from_email=from_email,
-                to=recipient_list,
-                reply_to=[from_email],
-            )
-
-            email.attach_alternative(email_html, "text/html")
-            email.send()
+            send_password_reset_email.delay(user.pk, protocol, domain)
             return JsonResponse({"message": "Password reset email sent."})
 
     return JsonResponse({"message": "Invalid request."}, status=400)
@@ -128,13 +100,17 @@ class GoogleLoginRedirectApi(PublicApi):
         return redirect(authorization_url)
 
 
-class GoogleLoginApi(PublicApi):
+class GoogleLoginApi(AsyncAPIView, PublicApi):
     class InputSerializer(serializers.Serializer):
         code = serializers.CharField(required=False)
         error = serializers.CharField(required=False)
         state = serializers.CharField(required=False)
 
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
+        with timed("google_login"):
+            return await self.handle_callback(request)
+
+    async def handle_callback(self, request):
         input_serializer = self.InputSerializer(data=request.GET)
         input_serializer.is_valid(raise_exception=True)
 
@@ -153,15 +129,13 @@ class GoogleLoginApi(PublicApi):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        session_state = request.session.get("google_oauth2_state")
+        session_state = await request.session.apop("google_oauth2_state", None)
 
         if session_state is None:
             return Response(
                 {"error": "CSRF check failed."}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        del request.session["google_oauth2_state"]
-
         if state != session_state:
             return Response(
                 {"error": "CSRF check failed."}, status=status.HTTP_400_BAD_REQUEST
@@ -169,12 +143,27 @@ class GoogleLoginApi(PublicApi):
 
         google_login_flow = GoogleRawLoginFlowService()
 
-        google_tokens = google_login_flow.get_tokens(code=code)
-
-        id_token_decoded = google_tokens.decode_id_token()
+        try:
+            # Under WSGI every request runs on a loop of its own, which could
+            # not keep an async client's connections alive between logins.
+            if isinstance(request._request, ASGIRequest):
+                google_tokens = await google_login_flow.aget_tokens(code=code)
+            else:
+                google_tokens = await sync_to_async(google_login_flow.get_tokens)(code=code)
+            # The signing keys are cached; a refresh still goes through requests.
+            id_token_decoded = await sync_to_async(google_tokens.decode_id_token)()
+        except (httpx.HTTPError, requests.RequestException):
+            return Response(
+                {"error": "Google login is unavailable."}, status=status.HTTP_502_BAD_GATEWAY
+            )
+        except jwt.InvalidTokenError:
+            return Response(
+                {"error": "Invalid ID token."}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        user_email = id_token_decoded["email"]
+        return await sync_to_async(self.login_user)(id_token_decoded["email"])
 
+    def login_user(self, user_email):
         try:
             user = User.objects.get(email=user_email)
         except ObjectDoesNotExist:
@@ -184,27 +173,7 @@ class GoogleLoginApi(PublicApi):
                 email=user_email,
                 password=password
             )
-            context = {
-                "user": user,
-                "password": password
-            }
-            email_html = render_to_string("register.html", context)
-            email_text = strip_tags(email_html)
-
-            subject = "Cadastro realizado com sucesso!"
-            from_email = os.environ.get("EMAIL_HOST_USER")
-            recipient_list = [user_email]
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=email_text,
-                from_email=from_email,
-                to=recipient_list,
-                reply_to=[from_email],
-            )
-
-            email.attach_alternative(email_html, "text/html")
-            email.send()
+            transaction.on_commit(lambda: send_google_registration_email.delay(user.pk))
 
         token, created = Token.objects.get_or_create(user=user)
         api_token = token.key
@@ -224,26 +193,13 @@ class GoogleLoginApi(PublicApi):
 
 
 class UserRegistrationApi(APIView):
+    @method_decorator(timed("registration"))
     def post(self, request, *args, **kwargs):
         serializer = RegistrationSerializer(data=request.data)
         try:
             if serializer.is_valid(raise_exception=True):
                 user = serializer.save()
-                context = {'user': user.username}
-                email_html = render_to_string("register.html", context)
-                email_text = strip_tags(email_html)
-                subject = "Bem Vindo(a)!"
-                from_email = os.environ.get("EMAIL_HOST_USER")
-                recipient_list = [user.email]
-                email = EmailMultiAlternatives(
-                    subject=subject,
-                    body=email_text,
-                    from_email=from_email,
-                    to=recipient_list,
-                    reply_to=[from_email],
-                )
-                email.attach_alternative(email_html, "text/html")
-                email.send()
+                transaction.on_commit(lambda: send_registration_email.delay(user.pk))
                 return Response(
                     {"message": "User registered successfully. A confirmation email has been sent."},
                     status=status.HTTP_201_CREATED,
@@ -0,0 +1,224 @@
+import json
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from authorizer.authentication import invalidate_tokens
+from bills.categories import category_cache
+from bills.models import Debt
+from FINANCE_CORE.tasks import check_pending_debts
+
+from .scenarios import BenchmarkError
+from .seed import BENCHMARK_PASSWORD, DEFAULT_STATUS_WEIGHTS, seed_categories, seed_debts, seed_users
+
+QUERY_BUDGET_SIZES = (10, 10_000)
+ORIGIN_FRAMES = 4
+# Besides the user the endpoints run as, one user per this many rows owns
+# debts for check_pending_debts to go through.
+TASK_USER_RATIO = 100
+SEARCH_TERM = 'aluguel'
+PLACEHOLDER_LIST = re.compile(r'(?:%s, ){3,}%s')
+
+
+class QueryBudget:
+    def __init__(self, name, build, max_queries, max_repeated=0):
+        self.name = name
+        self.build = build
+        self.max_queries = max_queries
+        self.max_repeated = max_repeated
+
+
+class QueryLog:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, query_origin()))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self):
+        # The same statement run again with other parameters is what an N+1 looks like.
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    @staticmethod
+    def shorten(sql):
+        return PLACEHOLDER_LIST.sub('%s, ..., %s', sql)
+
+    @property
+    def repeated_count(self):
+        return sum(count - 1 for count in self.repeated().values())
+
+
+def _is_project_frame(frame, base_dir):
+    return (
+        frame.filename.startswith(base_dir)
+        and Path(frame.filename).name != 'manage.py'
+        and 'site-packages' not in frame.filename
+        and not frame.filename.startswith(str(Path(__file__).parent))
+    )
+
+
+def query_origin():
+    base_dir = str(settings.BASE_DIR)
+    frames = [frame for frame in traceback.extract_stack() if _is_project_frame(frame, base_dir)]
+    return [
+        f"{Path(frame.filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-ORIGIN_FRAMES:]
+    ]
+
+
+class BudgetDataset:
+    def __init__(self, size, seed):
+        rng = np.random.default_rng(seed)
+        today = timezone.localdate()
+        category_ids = seed_categories()
+        task_users = max(1, size // TASK_USER_RATIO)
+        owner_id, admin_id, *task_user_ids = seed_users(2 + task_users)
+
+        seed_debts([owner_id], [size], category_ids, DEFAULT_STATUS_WEIGHTS, 365, 365, 0, rng, size)
+        seed_debts(
+            task_user_ids, rng.multinomial(size, [1 / task_users] * task_users), category_ids, DEFAULT_STATUS_WEIGHTS,
+            1, 1, 0, rng, size,
+        )
+
+        User.objects.filter(pk=admin_id).update(is_staff=True)
+        # Pending debts alternate between overdue and due tomorrow.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE bills_debt SET status = %s, email_sent_for_due_soon = false, "
+                "due_date = CASE WHEN id %% 2 = 0 THEN %s ELSE %s END WHERE user_id = ANY(%s)",
+                [Debt.PENDING, today - timedelta(days=1), today + timedelta(days=1), task_user_ids],
+            )
+
+        self.size = size
+        self.user = User.objects.get(pk=owner_id)
+        self.token = Token.objects.get(user=self.user).key
+        self.admin_token = Token.objects.get(user_id=admin_id).key
+        self.debt_id = Debt.objects.filter(user=self.user).order_by('id').values_list('id', flat=True).first()
+        # A search without results skips the page query, which would look like
+        # a count that grows with the data.
+        Debt.objects.filter(pk=self.debt_id).update(title=SEARCH_TERM.capitalize())
+        self.client = Client(headers={'authorization': f'Token {self.token}'})
+        self.admin = Client(headers={'authorization': f'Token {self.admin_token}'})
+        self.anonymous = Client(headers={'host': 'testserver'})
+
+    def reset_caches(self):
+        # Budgets are checked against cold caches, the most queries a request can run.
+        cache.clear()
+        invalidate_tokens(self.token, self.admin_token)
+        category_cache.clear()
+
+
+def _get(url):
+    return lambda data: data.client.get(url)
+
+
+def categories(data):
+    return data.admin.get('/api/bills/categories/')
+
+
+def debt_detail(data):
+    return data.client.get(f'/api/bills/debts/{data.debt_id}/')
+
+
+def debt_update(data):
+    return data.client.patch(
+        f'/api/bills/debts/{data.debt_id}/', json.dumps({'title': 'Budget'}), content_type='application/json'
+    )
+
+
+def login(data):
+    return data.anonymous.post(
+        '/api/authorizer/login/', {'username': data.user.username, 'password': BENCHMARK_PASSWORD}
+    )
+
+
+def register(data):
+    username = f'budget_{data.size}'
+    return data.anonymous.post('/api/authorizer/register/', {
+        'username': username, 'email': f'{username}@example.com', 'password': 'x' * 12, 'confirm_password': 'x' * 12,
+    })
+
+
+def password_reset(data):
+    return data.anonymous.post(
+        '/api/authorizer/password-reset/', json.dumps({'email': data.user.email}), content_type='application/json'
+    )
+
+
+def pending_debts_task(data):
+    return check_pending_debts()
+
+
+QUERY_BUDGETS = [
+    QueryBudget('debts.list', _get('/api/bills/debts/'), max_queries=4),
+    QueryBudget('debts.list.cursor', _get('/api/bills/debts/?pagination=cursor'), max_queries=3),
+    QueryBudget('debts.list.search', _get(f'/api/bills/debts/?search={SEARCH_TERM}'), max_queries=4),
+    QueryBudget('debts.detail', debt_detail, max_queries=3),
+    QueryBudget('debts.detail.update', debt_update, max_queries=5),
+    QueryBudget('me', _get('/api/bills/me/'), max_queries=3),
+    QueryBudget('categories', categories, max_queries=2),
+    QueryBudget('auth.login', login, max_queries=2),
+    QueryBudget('auth.register', register, max_queries=3),
+    QueryBudget('auth.password_reset', password_reset, max_queries=7),
+    QueryBudget('tasks.check_pending_debts', pending_debts_task, max_queries=8),
+]
+
+
+def measure_budget(budget, data):
+    data.reset_caches()
+    log = QueryLog()
+    # Writes are rolled back so every budget starts from the same data.
+    with transaction.atomic(), ExitStack() as stack:
+        for database in connections.all():
+            stack.enter_context(database.execute_wrapper(log))
+        response = budget.build(data)
+        transaction.set_rollback(True)
+
+    status_code = getattr(response, 'status_code', 200)
+    if status_code >= 400:
+        raise BenchmarkError(f"{budget.name} returned {status_code}.")
+    return log
+
+
+def budget_failures(budget, logs):
+    failures = []
+    for size, log in logs.items():
+        if log.count > budget.max_queries:
+            failures.append(f"{log.count} queries with {size} rows, budget is {budget.max_queries}")
+        if log.repeated_count > budget.max_repeated:
+            failures.append(f"{log.repeated_count} repeated queries with {size} rows, budget is {budget.max_repeated}")
+
+    counts = [log.count for _, log in sorted(logs.items())]
+    if counts and counts[-1] > counts[0]:
+        failures.append(f"query count grows with the data: {' -> '.join(map(str, counts))}")
+    return failures
+
+
+def check_query_budgets(budgets, sizes, seed):
+    logs = {budget.name: {} for budget in budgets}
+    for size in sizes:
+        # Each size is seeded from scratch and thrown away afterwards.
+        with transaction.atomic():
+            data = BudgetDataset(size, seed)
+            for budget in budgets:
+                logs[budget.name][size] = measure_budget(budget, data)
+            transaction.set_rollback(True)
+    return logs
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from django.conf import settings
+
+from bills.models import Debt
+
+from .runner import _percentile
+from .scenarios import DEBTS_URL, ME_URL, BenchmarkContext, BenchmarkError
+
+# Both servers run the same gunicorn.conf.py, only the application and the
+# worker class differ.
+SERVERS = {
+    'wsgi': ('FINANCE_CORE.wsgi:application', 'sync'),
+    'asgi': ('FINANCE_CORE.asgi:application', 'uvicorn_worker.UvicornWorker'),
+}
+DEFAULT_CONCURRENCY = (1, 16, 64)
+SERVER_START_TIMEOUT = 30
+SERVER_LOG_LINES = 20
+
+
+def concurrency_targets(context):
+    debt_id = Debt.objects.filter(user=context.user).order_by('id').values_list('id', flat=True).first()
+    return {
+        'me': ME_URL,
+        'debts.list': DEBTS_URL,
+        'debts.detail': f'{DEBTS_URL}{debt_id}/',
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class BenchmarkServer:
+    def __init__(self, name, workers, threads):
+        self.name = name
+        self.app, self.worker_class = SERVERS[name]
+        self.workers = workers
+        self.threads = threads
+        self.port = _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            'PORT': str(self.port),
+            'GUNICORN_WORKER_CLASS': self.worker_class,
+            'WEB_CONCURRENCY': str(self.workers),
+            'GUNICORN_THREADS': str(self.threads),
+        }
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', self.app, '--config', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+            cwd=settings.BASE_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        try:
+            self.wait_ready()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def wait_ready(self):
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise BenchmarkError(f"The {self.name} server exited with {self.process.returncode}:\n{self.tail()}")
+            try:
+                httpx.get(f'{self.url}{ME_URL}', timeout=1)
+                return
+            except httpx.TransportError:
+                time.sleep(0.2)
+        raise BenchmarkError(f"The {self.name} server did not start in {SERVER_START_TIMEOUT}s:\n{self.tail()}")
+
+    def tail(self):
+        self.log.seek(0)
+        return b'\n'.join(self.log.read().splitlines()[-SERVER_LOG_LINES:]).decode(errors='replace')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=SERVER_START_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+
+
+async def drive(url, token, concurrency, duration):
+    timings = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers={'authorization': f'Token {token}'}, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def connection():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code == 200:
+                    timings.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if not timings:
+        raise BenchmarkError(f"Every request to {url} failed.")
+    return {
+        'concurrency': concurrency,
+        'requests': len(timings),
+        'errors': errors,
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+    }
+
+
+def run_concurrency_benchmarks(
+    servers, targets, concurrency_levels, duration, warmup, workers, threads, username=None, progress=None
+):
+    context = BenchmarkContext(username)
+    paths = concurrency_targets(context)
+    results = {}
+    for name in servers:
+        with BenchmarkServer(name, workers, threads) as server:
+            for target in targets:
+                url = f'{server.url}{paths[target]}'
+                # Fills the per-process caches and opens the connections first.
+                asyncio.run(drive(url, context.token, max(concurrency_levels), warmup))
+                for concurrency in concurrency_levels:
+                    result = asyncio.run(drive(url, context.token, concurrency, duration))
+                    results.setdefault(name, {}).setdefault(target, []).append(result)
+                    if progress:
+                        progress(name, target, result)
+    return results
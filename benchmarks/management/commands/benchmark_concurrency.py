@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.concurrency import DEFAULT_CONCURRENCY, SERVERS, run_concurrency_benchmarks
+from benchmarks.runner import save_results
+from benchmarks.scenarios import BenchmarkError
+
+TARGETS = ('me', 'debts.list', 'debts.detail')
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts gunicorn with sync workers on FINANCE_CORE.wsgi and with uvicorn workers on FINANCE_CORE.asgi, "
+        "then compares the throughput and latency of the me, debt list and debt detail endpoints at each "
+        "--concurrency, as seen by that many open connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', action='append', choices=list(SERVERS), help="Repeatable, defaults to both.")
+        parser.add_argument('--target', action='append', choices=TARGETS, help="Repeatable, defaults to all.")
+        parser.add_argument('--concurrency', default=','.join(map(str, DEFAULT_CONCURRENCY)))
+        parser.add_argument('--duration', type=float, default=10, help="Seconds spent at each concurrency.")
+        parser.add_argument('--warmup', type=float, default=2, help="Seconds of warm-up per target.")
+        parser.add_argument('--workers', type=int, default=2, help="Worker processes per server.")
+        parser.add_argument('--threads', type=int, default=1, help="Threads per sync worker.")
+        parser.add_argument('--user', help="Benchmark username to run as, defaults to the heaviest one.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        servers = options['server'] or list(SERVERS)
+        targets = options['target'] or list(TARGETS)
+        concurrency_levels = sorted(int(level) for level in options['concurrency'].split(','))
+
+        self.stdout.write(
+            f"{'server':<6} {'target':<14} {'conns':>5} {'req/s':>9} {'median':>10} {'p95':>10} {'p99':>10} "
+            f"{'errors':>6}"
+        )
+        try:
+            results = run_concurrency_benchmarks(
+                servers, targets, concurrency_levels, options['duration'], options['warmup'], options['workers'],
+                options['threads'], options['user'], progress=self.write_result,
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        if len(servers) > 1:
+            self.compare(results, targets, concurrency_levels)
+
+        if options['output']:
+            save_results(options['output'], results)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+    def write_result(self, server, target, result):
+        self.stdout.write(
+            f"{server:<6} {target:<14} {result['concurrency']:>5} {result['requests_per_second']:>9.1f} "
+            f"{result['median_ms']:>8.2f}ms {result['p95_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms "
+            f"{result['errors']:>6}"
+        )
+
+    def compare(self, results, targets, concurrency_levels):
+        self.stdout.write("")
+        self.stdout.write(f"{'target':<14} {'conns':>5} {'wsgi req/s':>11} {'asgi req/s':>11} {'change':>8}")
+        for target in targets:
+            for index, concurrency in enumerate(concurrency_levels):
+                wsgi = results['wsgi'][target][index]['requests_per_second']
+                asgi = results['asgi'][target][index]['requests_per_second']
+                change = (asgi / wsgi - 1) * 100 if wsgi else 0
+                self.stdout.write(f"{target:<14} {concurrency:>5} {wsgi:>11.1f} {asgi:>11.1f} {change:>+7.1f}%")
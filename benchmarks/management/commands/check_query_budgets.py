@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.budgets import QUERY_BUDGET_SIZES, QUERY_BUDGETS, budget_failures, check_query_budgets
+from benchmarks.scenarios import BenchmarkError
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks every API endpoint and check_pending_debts against its SQL query budget, on a fresh test "
+        "database seeded at each --sizes, and fails if a budget is exceeded, queries repeat or the count "
+        "grows with the data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', action='append', help="Budget name or prefix, repeatable.")
+        parser.add_argument('--sizes', default=','.join(map(str, QUERY_BUDGET_SIZES)))
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keepdb', action='store_true', help="Reuse the test database between runs.")
+
+    def handle(self, *args, **options):
+        budgets = [
+            budget for budget in QUERY_BUDGETS
+            if not options['budget'] or any(budget.name.startswith(name) for name in options['budget'])
+        ]
+        if not budgets:
+            raise CommandError("No budget matches the given names.")
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'])
+        try:
+            logs = check_query_budgets(budgets, sizes, options['seed'])
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        self.stdout.write(f"{'budget':<28} " + " ".join(f"{size:>8}" for size in sizes) + f" {'max':>5}")
+        failed = []
+        for budget in budgets:
+            counts = " ".join(f"{logs[budget.name][size].count:>8}" for size in sizes)
+            failures = budget_failures(budget, logs[budget.name])
+            line = f"{budget.name:<28} {counts} {budget.max_queries:>5}"
+            if failures:
+                failed.append((budget, failures))
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        for budget, failures in failed:
+            self.write_failure(budget, failures, logs[budget.name][sizes[-1]])
+
+        if failed:
+            raise CommandError(f"{len(failed)} query budget(s) failed: {', '.join(b.name for b, _ in failed)}.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(budgets)} query budgets hold."))
+
+    def write_failure(self, budget, failures, log):
+        self.stdout.write("")
+        self.stdout.write(self.style.ERROR(f"{budget.name}: {'; '.join(failures)}"))
+        repeated = log.repeated()
+        for index, (sql, origin) in enumerate(log.queries, 1):
+            marker = f" (x{repeated[sql]})" if sql in repeated else ""
+            self.stdout.write(f"  {index}. {log.shorten(sql)}{marker}")
+            for frame in origin:
+                self.stdout.write(f"       at {frame}")
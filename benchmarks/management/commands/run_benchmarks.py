@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import compare_results, load_results, run_benchmarks, save_results, select_scenarios
+from benchmarks.scenarios import SCENARIOS, BenchmarkError
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the debt list, me, token authentication and check_pending_debts scenarios against the seeded "
+        "benchmark data. --output writes a JSON baseline; --compare fails when a median regressed by more "
+        "than --threshold or a scenario runs more queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append',
+            help=f"Scenario name or prefix, repeatable. Available: {', '.join(s.name for s in SCENARIOS)}.",
+        )
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--user', help="Benchmark username to run as, defaults to the heaviest one.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="Baseline JSON file to compare the results against.")
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help="Allowed median slowdown before a scenario counts as a regression (0.2 = 20%%).",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = select_scenarios(options['scenario'])
+        if not scenarios:
+            raise CommandError("No scenario matches the given names.")
+        baseline = load_results(options['compare']) if options['compare'] else None
+
+        try:
+            results = run_benchmarks(
+                scenarios, options['repeat'], options['warmup'], options['user'], progress=self.write_result
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        if options['output']:
+            save_results(options['output'], results)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if baseline is not None:
+            self.compare(baseline, results, options['threshold'])
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f"{name:<32} median {result['median_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+            f"min {result['min_ms']:>9.2f}ms  {result['queries']:>3} queries"
+        )
+
+    def compare(self, baseline, results, threshold):
+        self.stdout.write("")
+        self.stdout.write(f"{'scenario':<32} {'baseline':>10} {'current':>10} {'change':>8} {'queries':>9}")
+        regressions = []
+        for name, before, after, ratio, regressed in compare_results(baseline, results, threshold):
+            if before is None:
+                self.stdout.write(f"{name:<32} {'-':>10} {after['median_ms']:>8.2f}ms {'new':>8}")
+                continue
+            line = (
+                f"{name:<32} {before['median_ms']:>8.2f}ms {after['median_ms']:>8.2f}ms {(ratio - 1) * 100:>+7.1f}% "
+                f"{before['queries']:>4} -> {after['queries']}"
+            )
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} scenario(s) regressed more than {threshold:.0%} or run more queries: "
+                f"{', '.join(regressions)}."
+            )
+        self.stdout.write(self.style.SUCCESS(f"No scenario regressed more than {threshold:.0%}."))
@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.seed import (
+    DEFAULT_STALE_PENDING,
+    debts_per_user,
+    parse_status_weights,
+    reset_benchmark_data,
+    seed_categories,
+    seed_debts,
+    seed_users,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds benchmark users, categories and debts with COPY. Users are named bench_<n> and share the "
+        "password 'benchmark'. Generation is deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--debts', type=int, default=1_000_000)
+        parser.add_argument(
+            '--status-weights',
+            help="Relative weight per status, e.g. 'Pendente=0.35,Pago=0.55,Atrasado=0.1'.",
+        )
+        parser.add_argument('--past-days', type=int, default=730, help="How far back due dates go.")
+        parser.add_argument('--future-days', type=int, default=365, help="How far ahead due dates go.")
+        parser.add_argument(
+            '--stale-pending', type=float, default=DEFAULT_STALE_PENDING,
+            help="Share of pending debts whose due date already passed.",
+        )
+        parser.add_argument('--batch-size', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--reset', action='store_true', help="Delete previously seeded benchmark data first.")
+
+    def handle(self, *args, **options):
+        try:
+            status_weights = parse_status_weights(options['status_weights'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['users'] < 1 or options['debts'] < 0:
+            raise CommandError("--users must be positive and --debts not negative.")
+
+        rng = np.random.default_rng(options['seed'])
+        started = time.perf_counter()
+
+        if options['reset']:
+            reset_benchmark_data()
+            self.stdout.write("Previous benchmark data deleted.")
+
+        category_ids = seed_categories()
+        user_ids = seed_users(options['users'])
+        self.stdout.write(f"{len(user_ids)} users and tokens created.")
+
+        counts = debts_per_user(options['debts'], len(user_ids), rng)
+        created = seed_debts(
+            user_ids,
+            counts,
+            category_ids,
+            status_weights,
+            options['past_days'],
+            options['future_days'],
+            options['stale_pending'],
+            rng,
+            options['batch_size'],
+            progress=lambda done, total: self.stdout.write(f"{done}/{total} debts copied."),
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created} debts for {len(user_ids)} users in {time.perf_counter() - started:.1f}s "
+            f"(heaviest user: {counts.max()} debts)."
+        ))
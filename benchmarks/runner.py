@@ -0,0 +1,111 @@
+import json
+import platform
+import statistics
+import time
+from contextlib import ExitStack
+
+import django
+from django.db import connection, connections
+from django.utils import timezone
+
+from bills.models import Debt
+
+from .scenarios import SCENARIOS, BenchmarkContext
+
+
+def _percentile(timings, percent):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+
+class QueryCounter:
+    # CaptureQueriesContext loses the count when the test client's
+    # request_started signal resets connection.queries.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(run, repeat, warmup):
+    for _ in range(warmup):
+        run()
+
+    queries = QueryCounter()
+    with ExitStack() as stack:
+        for database in connections.all():
+            stack.enter_context(database.execute_wrapper(queries))
+        run()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': queries.count,
+    }
+
+
+def select_scenarios(names=None):
+    if not names:
+        return SCENARIOS
+    return [scenario for scenario in SCENARIOS if any(scenario.name.startswith(name) for name in names)]
+
+
+def run_benchmarks(scenarios, repeat, warmup, username=None, progress=None):
+    context = BenchmarkContext(username)
+    results = {}
+    for scenario in scenarios:
+        run = scenario.build(context)
+        results[scenario.name] = measure(run, min(repeat, scenario.repeat or repeat), warmup)
+        if progress:
+            progress(scenario.name, results[scenario.name])
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'postgres': connection.cursor().connection.info.server_version,
+        },
+        'dataset': {
+            'debts': Debt.objects.count(),
+            'user': context.user.username,
+            'user_debts': context.user.debt_count,
+        },
+        'scenarios': results,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    rows = []
+    for name, result in current['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            rows.append((name, None, result, None, False))
+            continue
+        ratio = result['median_ms'] / previous['median_ms'] if previous['median_ms'] else 1
+        # Query counts do not depend on the machine, so any increase counts.
+        regressed = ratio > 1 + threshold or result['queries'] > previous['queries']
+        rows.append((name, previous, result, ratio, regressed))
+    return rows
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_results(path, results):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+        file.write('\n')
@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+
+from authorizer.authentication import CachedTokenAuthentication, invalidate_tokens
+from bills.models import Debt
+from bills.services import invalidate_financial_summary
+from FINANCE_CORE.tasks import check_pending_debts
+
+from .seed import BENCHMARK_USERNAME_PREFIX
+
+DEBTS_URL = '/api/bills/debts/'
+ME_URL = '/api/bills/me/'
+CURSOR_DEPTH = 20
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Scenario:
+    def __init__(self, name, build, repeat=None):
+        self.name = name
+        self.build = build
+        self.repeat = repeat
+
+
+class BenchmarkContext:
+    def __init__(self, username=None):
+        users = User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX)
+        if username:
+            users = users.filter(username=username)
+        # The heaviest user is the worst case the list endpoints have to serve.
+        self.user = users.annotate(debt_count=Count('debts')).order_by('-debt_count', 'id').first()
+        if self.user is None:
+            raise BenchmarkError("No benchmark users found, run seed_benchmark_data first.")
+
+        self.token = Token.objects.get(user=self.user).key
+        self.client = Client(headers={'authorization': f'Token {self.token}'})
+        self.today = timezone.localdate()
+
+    def get(self, url, data=None):
+        response = self.client.get(url, data)
+        if response.status_code != 200:
+            raise BenchmarkError(f"GET {url} {data or ''} returned {response.status_code}.")
+        return response
+
+
+def debt_list(params):
+    def build(context):
+        return lambda: context.get(DEBTS_URL, params)
+    return build
+
+
+def debt_list_filtered(context):
+    params = {
+        'status': Debt.PENDING,
+        'start_date': context.today.isoformat(),
+        'end_date': (context.today + timedelta(days=30)).isoformat(),
+    }
+    return lambda: context.get(DEBTS_URL, params)
+
+
+def debt_list_deep_page(context):
+    params = {'page': max(1, context.user.debt_count // api_settings.PAGE_SIZE // 2)}
+    return lambda: context.get(DEBTS_URL, params)
+
+
+def debt_list_deep_cursor(context):
+    url, params = DEBTS_URL, {'pagination': 'cursor'}
+    for _ in range(CURSOR_DEPTH):
+        next_url = context.get(url, params).json()['next']
+        if next_url is None:
+            break
+        url, params = next_url, None
+    return lambda: context.get(url, params)
+
+
+def me(warm):
+    def build(context):
+        def run():
+            if not warm:
+                invalidate_financial_summary(context.user.id)
+            context.get(ME_URL)
+        return run
+    return build
+
+
+def token_auth(warm):
+    def build(context):
+        authentication = CachedTokenAuthentication()
+
+        def run():
+            if not warm:
+                invalidate_tokens(context.token)
+            authentication.authenticate_credentials(context.token)
+        return run
+    return build
+
+
+def pending_debts_task(context):
+    def run():
+        # The task rewrites statuses and flags; rolling back keeps every
+        # repetition working on the seeded data.
+        with transaction.atomic():
+            check_pending_debts()
+            transaction.set_rollback(True)
+    return run
+
+
+SCENARIOS = [
+    Scenario('debts.list.first_page', debt_list({})),
+    Scenario('debts.list.filtered', debt_list_filtered),
+    Scenario('debts.list.search_fulltext', debt_list({'search': 'aluguel'})),
+    Scenario('debts.list.search_substring', debt_list({'search': 'luz', 'search_mode': 'substring'})),
+    Scenario('debts.list.sparse_fields', debt_list({'fields': 'id,title,amount,due_date,status'})),
+    Scenario('debts.list.deep_page', debt_list_deep_page),
+    Scenario('debts.list.deep_cursor', debt_list_deep_cursor),
+    Scenario('me.cold', me(warm=False)),
+    Scenario('me.warm', me(warm=True)),
+    Scenario('auth.token.cold', token_auth(warm=False)),
+    Scenario('auth.token.warm', token_auth(warm=True)),
+    Scenario('tasks.check_pending_debts', pending_debts_task, repeat=3),
+]
@@ -0,0 +1,178 @@
+import binascii
+import os
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bills.models import Category, Debt
+
+BENCHMARK_USERNAME_PREFIX = "bench_"
+BENCHMARK_PASSWORD = "benchmark"
+
+CATEGORY_NAMES = [
+    "Casa", "Mercado", "Transporte", "Saúde", "Educação", "Lazer", "Assinaturas", "Impostos", "Cartão", "Outros",
+]
+DEBT_TITLES = [
+    "Aluguel", "Condomínio", "Conta de luz", "Conta de água", "Internet", "Telefone", "Supermercado",
+    "Farmácia", "Plano de saúde", "Academia", "Escola", "Curso de inglês", "Streaming", "IPVA", "IPTU",
+    "Seguro do carro", "Combustível", "Fatura do cartão", "Empréstimo", "Presente de aniversário",
+]
+DEBT_NOTES = [
+    "Pagar até o vencimento", "Débito automático", "Parcelado em 10 vezes", "Dividir com a família",
+    "Boleto enviado por email", "Pagar no aplicativo do banco",
+]
+
+DEFAULT_STATUS_WEIGHTS = {Debt.PENDING: 0.35, Debt.PAID: 0.55, Debt.OVERDUE: 0.10}
+# Share of pending debts left with a past due date, i.e. not yet picked up by
+# check_pending_debts.
+DEFAULT_STALE_PENDING = 0.02
+DEFAULT_NOTES_RATIO = 0.4
+
+# Tables with a user_id column, deleted before the benchmark users themselves.
+BENCHMARK_USER_TABLES = [
+    'bills_debt', 'bills_debttombstone', 'bills_recurringdebt', 'bills_debtimport', 'authtoken_token',
+]
+
+DEBT_COPY_COLUMNS = [
+    'title', 'amount', 'due_date', 'status', 'notes', 'user_id', 'email_sent_for_due_soon', 'category_id',
+]
+
+
+def parse_status_weights(value):
+    weights = dict(DEFAULT_STATUS_WEIGHTS)
+    if value:
+        for item in value.split(','):
+            name, _, weight = item.partition('=')
+            if name not in weights:
+                raise ValueError(f"Unknown status {name!r}, expected one of {', '.join(weights)}.")
+            weights[name] = float(weight)
+
+    total = sum(weights.values())
+    if total <= 0 or min(weights.values()) < 0:
+        raise ValueError("Status weights must be positive.")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def reset_benchmark_data():
+    pattern = f"{BENCHMARK_USERNAME_PREFIX}%"
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Raw deletes skip the per-row signals, which would write a tombstone
+        # for every seeded debt.
+        for table in BENCHMARK_USER_TABLES:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE user_id IN (SELECT id FROM auth_user WHERE username LIKE %s)",
+                [pattern],
+            )
+        cursor.execute("DELETE FROM auth_user WHERE username LIKE %s", [pattern])
+
+
+def seed_categories():
+    # Categories are shared by every user, so existing ones are reused as is.
+    if not Category.objects.exists():
+        Category.objects.bulk_create(Category(name=name) for name in CATEGORY_NAMES)
+    return list(Category.objects.values_list('id', flat=True))
+
+
+def seed_users(count):
+    now = timezone.now()
+    # Hashing is deliberately slow, so every benchmark user shares one.
+    password = make_password(BENCHMARK_PASSWORD)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(MAX(CAST(SUBSTRING(username FROM %s) AS integer)), 0) FROM auth_user "
+            "WHERE username ~ %s",
+            [f"^{BENCHMARK_USERNAME_PREFIX}(\\d+)$", f"^{BENCHMARK_USERNAME_PREFIX}\\d+$"],
+        )
+        offset = cursor.fetchone()[0]
+        usernames = [f"{BENCHMARK_USERNAME_PREFIX}{offset + index}" for index in range(1, count + 1)]
+
+        with cursor.copy(
+            "COPY auth_user (password, is_superuser, username, first_name, last_name, email, is_staff, "
+            "is_active, date_joined) FROM STDIN"
+        ) as copy:
+            for username in usernames:
+                copy.write_row([password, False, username, "", "", f"{username}@example.com", False, True, now])
+
+        cursor.execute("SELECT id FROM auth_user WHERE username = ANY(%s) ORDER BY id", [usernames])
+        user_ids = [row[0] for row in cursor.fetchall()]
+
+        with cursor.copy("COPY authtoken_token (key, created, user_id) FROM STDIN") as copy:
+            for user_id in user_ids:
+                copy.write_row([binascii.hexlify(os.urandom(20)).decode(), now, user_id])
+
+    return user_ids
+
+
+def debts_per_user(total, user_count, rng):
+    # A few heavy users and a long tail of light ones, like real accounts.
+    weights = rng.pareto(1.2, user_count) + 1
+    return rng.multinomial(total, weights / weights.sum())
+
+
+def generate_debts(user_ids, category_ids, status_weights, past_days, future_days, stale_pending, rng, today):
+    size = len(user_ids)
+    statuses = np.array(list(status_weights), dtype=object)
+    status = statuses[rng.choice(len(statuses), size=size, p=list(status_weights.values()))]
+
+    offsets = rng.integers(-past_days, future_days + 1, size=size)
+    overdue = status == Debt.OVERDUE
+    offsets[overdue] = -np.abs(offsets[overdue]) - 1
+    pending = status == Debt.PENDING
+    # check_pending_debts turns past pending debts overdue, so only a few are left behind.
+    fresh = pending & (offsets < 0) & (rng.random(size) >= stale_pending)
+    offsets[fresh] = np.abs(offsets[fresh])
+    due_dates = (np.datetime64(today) + offsets.astype('timedelta64[D]')).tolist()
+
+    cents = np.clip(np.round(rng.lognormal(mean=10.5, sigma=1.1, size=size)), 100, 99_999_999).astype(np.int64)
+    titles = rng.integers(0, len(DEBT_TITLES), size=size)
+    notes = np.where(rng.random(size) < DEFAULT_NOTES_RATIO, rng.integers(0, len(DEBT_NOTES), size=size), -1)
+    categories = np.asarray(category_ids)[rng.integers(0, len(category_ids), size=size)]
+    notified = rng.random(size) < 0.5
+    tomorrow = today + timedelta(days=1)
+
+    for index in range(size):
+        debt_status = status[index]
+        due_date = due_dates[index]
+        note = int(notes[index])
+        yield [
+            DEBT_TITLES[titles[index]],
+            Decimal(int(cents[index])).scaleb(-2),
+            due_date,
+            debt_status,
+            DEBT_NOTES[note] if note >= 0 else None,
+            int(user_ids[index]),
+            debt_status == Debt.PENDING and due_date <= tomorrow and bool(notified[index]),
+            int(categories[index]),
+        ]
+
+
+def seed_debts(user_ids, counts, category_ids, status_weights, past_days, future_days, stale_pending, rng,
+               batch_size, progress=None):
+    today = timezone.localdate()
+    owners = np.repeat(np.asarray(user_ids), counts)
+    # Interleave the owners so a user's debts are spread over the table like
+    # rows inserted over time.
+    rng.shuffle(owners)
+
+    created = 0
+    for start in range(0, len(owners), batch_size):
+        batch = owners[start:start + batch_size]
+        rows = generate_debts(batch, category_ids, status_weights, past_days, future_days, stale_pending, rng, today)
+        with transaction.atomic(), connection.cursor() as cursor:
+            with cursor.copy(f"COPY bills_debt ({', '.join(DEBT_COPY_COLUMNS)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+        created += len(batch)
+        if progress:
+            progress(created, len(owners))
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE bills_debt")
+        cursor.execute("ANALYZE auth_user")
+
+    return created
@@ -0,0 +1,22 @@
+from FINANCE_CORE.settings import *  # noqa: F401,F403
+from FINANCE_CORE.settings import INSTALLED_APPS
+
+# Benchmarks only need the local Postgres configured by the DB_* variables:
+# the cache is in-process, Celery runs eagerly and emails stay in memory.
+INSTALLED_APPS = INSTALLED_APPS + ["benchmarks"]
+
+DEBUG = False
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+CELERY_TASK_ALWAYS_EAGER = True
+
+CELERY_BROKER_URL = "memory://"
+
+CELERY_RESULT_BACKEND = "cache+memory://"
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import serializers
+
+from .models import Category
+
+CATEGORY_VERSION_CACHE_KEY = "bills:categories:version"
+
+
+def get_category_version():
+    version = cache.get(CATEGORY_VERSION_CACHE_KEY)
+    if version is None:
+        # Seed with a fresh value so a process holding a version from before an
+        # eviction can never mistake the new counter for its own.
+        cache.add(CATEGORY_VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(CATEGORY_VERSION_CACHE_KEY)
+    return version
+
+
+def bump_category_version():
+    try:
+        return cache.incr(CATEGORY_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.add(CATEGORY_VERSION_CACHE_KEY, time.time_ns(), None)
+        return cache.get(CATEGORY_VERSION_CACHE_KEY)
+
+
+class CategoryCache:
+    def __init__(self):
+        self._state = (None, {})
+        self._lock = threading.Lock()
+
+    def load(self):
+        version = get_category_version()
+        if version != self._state[0]:
+            with self._lock:
+                if version != self._state[0]:
+                    # Read from the primary: rows from a lagging replica would
+                    # be kept under the new version until the next change.
+                    categories = Category.objects.using(DEFAULT_DB_ALIAS).order_by('id').in_bulk()
+                    self._state = (version, categories)
+        return self._state
+
+    @property
+    def version(self):
+        return self.load()[0]
+
+    def all(self):
+        return list(self.load()[1].values())
+
+    def get(self, pk):
+        return self.load()[1].get(pk)
+
+    def clear(self):
+        with self._lock:
+            self._state = (None, {})
+
+
+category_cache = CategoryCache()
+
+
+class CachedCategoryField(serializers.PrimaryKeyRelatedField):
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Category.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        category = category_cache.get(pk)
+        if category is None:
+            self.fail('does_not_exist', pk_value=data)
+        return category
@@ -0,0 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has been modified since it was last fetched.'
+    default_code = 'precondition_failed'
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'The sync token has expired, perform a full sync.'
+    default_code = 'sync_token_expired'
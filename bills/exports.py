@@ -0,0 +1,67 @@
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+EXPORT_FIELDS = ['id', 'title', 'amount', 'due_date', 'status', 'notes', 'category_id', 'category__name']
+EXPORT_HEADER = ['id', 'title', 'amount', 'due_date', 'status', 'notes', 'category_id', 'category']
+EXPORT_CHUNK_SIZE = 2000
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+EXPORT_FORMATS = {
+    CSV: ('text/csv', 'debts.csv'),
+    NDJSON: ('application/x-ndjson', 'debts.ndjson'),
+}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def _iter_rows(queryset):
+    # Inside a transaction the server-side cursor is declared without HOLD,
+    # so Postgres streams rows instead of materialising the result first.
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in _iter_rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in _iter_rows(queryset):
+        yield encoder.encode(dict(zip(EXPORT_HEADER, row))) + '\n'
+
+
+# Under ASGI Django reads a sync iterator into a list before sending anything,
+# so exports served there pull EXPORT_CHUNK_SIZE rows per trip to the thread
+# that holds the cursor. Django calls close() on that same thread.
+class AsyncExportStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __aiter__(self):
+        return self.chunks()
+
+    async def chunks(self):
+        next_chunk = sync_to_async(lambda: ''.join(islice(self.stream, EXPORT_CHUNK_SIZE)))
+        while chunk := await next_chunk():
+            yield chunk
+
+    def close(self):
+        self.stream.close()
+
+
+EXPORT_STREAMS = {
+    CSV: stream_csv,
+    NDJSON: stream_ndjson,
+}
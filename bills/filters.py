@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from rest_framework.exceptions import ValidationError
+
+from .models import Debt
+from .search import FULLTEXT, search_debts
+
+
+def _parse_date(query_params, name):
+    value = query_params.get(name, None)
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError(f"Invalid {name} format. Please use YYYY-MM-DD.")
+
+
+def get_debt_period(query_params):
+    return _parse_date(query_params, 'start_date'), _parse_date(query_params, 'end_date')
+
+
+def get_debt_status(query_params):
+    debt_status = query_params.get('status', None)
+
+    if debt_status:
+        valid_statuses = [Debt.PENDING, Debt.OVERDUE, Debt.PAID]
+        if debt_status not in valid_statuses:
+            raise ValidationError("Invalid status value. Valid options are: PENDING, OVERDUE, PAID.")
+
+    return debt_status
+
+
+def search_queryset(queryset, query_params):
+    search = query_params.get('search', None)
+    search_mode = query_params.get('search_mode', FULLTEXT)
+
+    if search:
+        queryset = search_debts(queryset, search, search_mode)
+
+    return queryset
+
+
+def filter_debts(queryset, query_params):
+    start_date, end_date = get_debt_period(query_params)
+    debt_status = get_debt_status(query_params)
+
+    if start_date:
+        queryset = queryset.filter(due_date__gte=start_date)
+
+    if end_date:
+        queryset = queryset.filter(due_date__lte=end_date)
+
+    queryset = search_queryset(queryset, query_params)
+
+    if debt_status:
+        queryset = queryset.filter(status=debt_status)
+
+    return queryset
+
+
+def is_ranked_search(query_params):
+    return bool(query_params.get('search')) and query_params.get('search_mode', FULLTEXT) == FULLTEXT
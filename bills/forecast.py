@@ -0,0 +1,151 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from .categories import category_cache
+from .models import Debt
+from .recurrence import user_occurrences
+from .services import get_debt_version
+
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+FORECAST_BUCKETS = [DAY, WEEK, MONTH]
+
+FORECAST_DEFAULT_HORIZON = 90
+FORECAST_MAX_HORIZON = 730
+FORECAST_CACHE_KEY = "bills:forecast:{user_id}:{horizon}:{bucket}:{day}:{version}"
+FORECAST_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def parse_forecast_params(query_params):
+    try:
+        horizon = int(query_params.get('horizon', FORECAST_DEFAULT_HORIZON))
+    except ValueError:
+        raise ValidationError({'horizon': 'A valid integer is required.'})
+    if not 1 <= horizon <= FORECAST_MAX_HORIZON:
+        raise ValidationError({'horizon': f'Ensure this value is between 1 and {FORECAST_MAX_HORIZON}.'})
+
+    bucket = query_params.get('bucket', DAY)
+    if bucket not in FORECAST_BUCKETS:
+        raise ValidationError({'bucket': 'Valid options are: day, week, month.'})
+
+    return horizon, bucket
+
+
+def _month_start(day, months=0):
+    months += day.month - 1
+    return date(day.year + months // 12, months % 12 + 1, 1)
+
+
+def _next_bucket(start, bucket):
+    if bucket == DAY:
+        return start + timedelta(days=1)
+    if bucket == WEEK:
+        return start + timedelta(weeks=1)
+    return _month_start(start, 1)
+
+
+def bucket_starts(today, end, bucket):
+    if bucket == DAY:
+        starts = [today]
+    elif bucket == WEEK:
+        starts = [today - timedelta(days=today.weekday())]
+    else:
+        starts = [_month_start(today)]
+
+    while _next_bucket(starts[-1], bucket) <= end:
+        starts.append(_next_bucket(starts[-1], bucket))
+    return starts
+
+
+def load_obligations(user_id, today, end):
+    rows = list(
+        Debt.objects.filter(user_id=user_id, status__in=[Debt.PENDING, Debt.OVERDUE], due_date__lte=end)
+        # Whole cents keep the sums exact.
+        .annotate(cents=Cast(F('amount') * 100, BigIntegerField()))
+        .values_list('due_date', 'cents', 'category_id', 'status')
+    )
+    rows.extend(
+        (debt.due_date, int(debt.amount * 100), debt.category_id, debt.status)
+        for debt in user_occurrences(user_id, today, end=end)
+    )
+
+    columns = list(zip(*rows)) or [[], [], [], []]
+    return (
+        np.array(columns[0], dtype='datetime64[D]'),
+        np.array(columns[1], dtype=np.int64),
+        np.array(columns[2], dtype=np.int64),
+        np.array(columns[3], dtype=object) == Debt.OVERDUE,
+    )
+
+
+def _cents(value):
+    return str(Decimal(int(value)).scaleb(-2))
+
+
+def compute_forecast(user_id, today, horizon, bucket):
+    end = today + timedelta(days=horizon)
+    starts = bucket_starts(today, end, bucket)
+    due_dates, cents, category_ids, overdue = load_obligations(user_id, today, end)
+
+    # Everything already due falls in the first bucket; searchsorted maps the
+    # remaining dates onto the bucket whose start precedes them.
+    edges = np.array(starts, dtype='datetime64[D]')
+    buckets = np.clip(np.searchsorted(edges, np.maximum(due_dates, edges[0]), side='right') - 1, 0, None)
+    size = len(starts)
+
+    overdue_sums = np.bincount(buckets[overdue], weights=cents[overdue], minlength=size).round().astype(np.int64)
+    pending_sums = np.bincount(buckets[~overdue], weights=cents[~overdue], minlength=size).round().astype(np.int64)
+    totals = overdue_sums + pending_sums
+    cumulative = np.cumsum(totals)
+
+    categories, category_index = np.unique(category_ids, return_inverse=True)
+    by_category = np.bincount(
+        buckets * len(categories) + category_index, weights=cents, minlength=size * len(categories)
+    ).round().astype(np.int64).reshape(size, len(categories))
+
+    names = {category.id: category.name for category in category_cache.all()}
+    ends = starts[1:] + [_next_bucket(starts[-1], bucket)]
+
+    return {
+        'horizon': horizon,
+        'bucket': bucket,
+        'start': starts[0],
+        'end': end,
+        'total': _cents(cumulative[-1]),
+        'buckets': [
+            {
+                'start': starts[index],
+                'end': ends[index] - timedelta(days=1),
+                'overdue': _cents(overdue_sums[index]),
+                'pending': _cents(pending_sums[index]),
+                'total': _cents(totals[index]),
+                'cumulative': _cents(cumulative[index]),
+                'categories': [
+                    {'category': int(category_id), 'name': names.get(int(category_id)), 'amount': _cents(amount)}
+                    for category_id, amount in zip(categories, by_category[index])
+                    if amount
+                ],
+            }
+            for index in range(size)
+        ],
+    }
+
+
+def get_forecast(user_id, today, horizon, bucket):
+    key = FORECAST_CACHE_KEY.format(
+        user_id=user_id, horizon=horizon, bucket=bucket, day=today.isoformat(), version=get_debt_version(user_id)
+    )
+    forecast = cache.get(key)
+
+    if forecast is None:
+        forecast = compute_forecast(user_id, today, horizon, bucket)
+        cache.set(key, forecast, FORECAST_CACHE_TIMEOUT)
+
+    return forecast
@@ -0,0 +1,250 @@
+import codecs
+import csv
+import os
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .categories import category_cache
+from .models import Debt, DebtImport
+from .services import debts_changed, due_date_check_needed, schedule_due_date_checks
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MAX_STORED_ERRORS = 1000
+IMPORT_INLINE_MAX_BYTES = 512 * 1024
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y']
+STATUS_ALIASES = {
+    'PENDING': Debt.PENDING,
+    'PAID': Debt.PAID,
+    'OVERDUE': Debt.OVERDUE,
+    **{value.upper(): value for value, _ in Debt.STATUS_CHOICES},
+}
+COPY_COLUMNS = ['title', 'amount', 'due_date', 'status', 'notes', 'email_sent_for_due_soon', 'category_id', 'user_id']
+DUE_DATE = COPY_COLUMNS.index('due_date')
+STATUS = COPY_COLUMNS.index('status')
+
+NULL_CHARACTERS_ERROR = 'Null characters are not allowed.'
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def iter_csv_rows(binary_file):
+    reader = csv.DictReader(codecs.iterdecode(binary_file, 'utf-8-sig'))
+    for row_number, row in enumerate(reader, start=2):
+        yield row_number, {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+
+
+def _ofx_encoding(header_lines):
+    for line in header_lines:
+        if line.strip().upper() in (b'CHARSET:1252', b'CHARSET:WINDOWS-1252'):
+            return 'cp1252'
+    return 'utf-8'
+
+
+def _iter_ofx_tags(binary_file):
+    header_lines = []
+    lines = iter(binary_file)
+    for line in lines:
+        header_lines.append(line)
+        if b'<OFX>' in line.upper():
+            break
+
+    encoding = _ofx_encoding(header_lines)
+    # The <OFX> line itself may hold the whole document in XML flavoured files.
+    for raw_line in chain(header_lines[-1:], lines):
+        yield from OFX_TAG.findall(raw_line.decode(encoding, errors='replace'))
+
+
+def iter_ofx_rows(binary_file):
+    transaction_row = None
+    transaction_number = 0
+
+    for closing, tag, value in _iter_ofx_tags(binary_file):
+        tag = tag.upper()
+        if tag == 'STMTTRN':
+            if not closing:
+                transaction_number += 1
+                transaction_row = {}
+            elif transaction_row is not None:
+                row = _ofx_transaction_to_row(transaction_row)
+                if row is not None:
+                    yield transaction_number, row
+                transaction_row = None
+        elif transaction_row is not None and not closing:
+            transaction_row[tag] = value.strip()
+
+
+def _ofx_transaction_to_row(transaction_row):
+    try:
+        amount = Decimal(transaction_row.get('TRNAMT', '').replace(',', '.'))
+    except InvalidOperation:
+        amount = None
+
+    # Credits are income, not debts.
+    if amount is not None and amount >= 0:
+        return None
+
+    posted = transaction_row.get('DTPOSTED', '')[:8]
+    return {
+        'title': transaction_row.get('NAME') or transaction_row.get('MEMO', ''),
+        'amount': str(-amount) if amount is not None else transaction_row.get('TRNAMT', ''),
+        'due_date': f'{posted[:4]}-{posted[4:6]}-{posted[6:8]}' if len(posted) == 8 else posted,
+        'status': Debt.PAID,
+        'notes': transaction_row.get('MEMO', ''),
+        'category': '',
+    }
+
+
+def guess_file_format(filename):
+    return DebtImport.OFX if os.path.splitext(filename)[1].lower() == '.ofx' else DebtImport.CSV
+
+
+ROW_PARSERS = {
+    DebtImport.CSV: iter_csv_rows,
+    DebtImport.OFX: iter_ofx_rows,
+}
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class DebtRowValidator:
+    def __init__(self):
+        self.title_max_length = Debt._meta.get_field('title').max_length
+        amount_field = Debt._meta.get_field('amount')
+        self.amount_limit = Decimal(10) ** (amount_field.max_digits - amount_field.decimal_places)
+        self.amount_quantum = Decimal(1).scaleb(-amount_field.decimal_places)
+        self.default_category_id = Debt._meta.get_field('category').get_default()
+        self.categories = {category.name.lower(): category.id for category in category_cache.all()}
+
+    def validate_batch(self, batch):
+        valid, invalid = [], []
+        for row_number, row in batch:
+            values, errors = self.validate_row(row)
+            if errors:
+                invalid.append({'row': row_number, 'errors': errors})
+            else:
+                valid.append(values)
+        return valid, invalid
+
+    def validate_text(self, row, errors):
+        title = row.get('title', '')
+        if not title:
+            errors['title'] = 'This field is required.'
+        elif len(title) > self.title_max_length:
+            errors['title'] = f'Ensure this field has no more than {self.title_max_length} characters.'
+        elif '\x00' in title:
+            errors['title'] = NULL_CHARACTERS_ERROR
+
+        # Postgres text columns cannot hold NUL, COPY would abort the batch.
+        notes = row.get('notes') or None
+        if notes is not None and '\x00' in notes:
+            errors['notes'] = NULL_CHARACTERS_ERROR
+
+        return title, notes
+
+    def validate_row(self, row):
+        errors = {}
+        title, notes = self.validate_text(row, errors)
+
+        amount = None
+        try:
+            amount = Decimal(row.get('amount', '').replace(',', '.'))
+            if not amount.is_finite() or abs(amount) >= self.amount_limit:
+                raise InvalidOperation
+            amount = amount.quantize(self.amount_quantum)
+        except InvalidOperation:
+            errors['amount'] = 'A valid number is required.'
+
+        due_date = _parse_date(row.get('due_date', ''))
+        if due_date is None:
+            errors['due_date'] = 'Date has wrong format. Use one of these formats instead: YYYY-MM-DD, DD/MM/YYYY.'
+
+        debt_status = STATUS_ALIASES.get((row.get('status') or Debt.PENDING).upper())
+        if debt_status is None:
+            errors['status'] = f"\"{row.get('status')}\" is not a valid choice."
+
+        category_name = row.get('category', '')
+        category_id = self.categories.get(category_name.lower()) if category_name else self.default_category_id
+        if category_id is None:
+            errors['category'] = f'Category "{category_name}" does not exist.'
+
+        if errors:
+            return None, errors
+
+        return (title, amount, due_date, debt_status, notes, False, category_id), None
+
+
+def copy_debts(user_id, rows):
+    with connection.cursor() as cursor:
+        columns = ', '.join(COPY_COLUMNS)
+        with cursor.copy(f'COPY {Debt._meta.db_table} ({columns}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row(row + (user_id,))
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_debt_import(debt_import, binary_file, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    validator = DebtRowValidator()
+    rows = ROW_PARSERS[debt_import.file_format](binary_file)
+
+    DebtImport.objects.filter(pk=debt_import.pk).update(status=DebtImport.RUNNING)
+    debt_import.status = DebtImport.RUNNING
+
+    try:
+        for batch in _batches(rows, batch_size):
+            valid, invalid = validator.validate_batch(batch)
+
+            with transaction.atomic():
+                copy_debts(debt_import.user_id, valid)
+            if valid:
+                debts_changed(debt_import.user_id)
+            today = timezone.localdate()
+            if any(due_date_check_needed(row[STATUS], row[DUE_DATE], today) for row in valid):
+                schedule_due_date_checks(user_ids=[debt_import.user_id])
+
+            debt_import.processed_rows += len(batch)
+            debt_import.imported_rows += len(valid)
+            debt_import.error_rows += len(invalid)
+            room = IMPORT_MAX_STORED_ERRORS - len(debt_import.errors)
+            debt_import.errors.extend(invalid[:max(room, 0)])
+            debt_import.save(update_fields=['processed_rows', 'imported_rows', 'error_rows', 'errors'])
+
+            if progress is not None:
+                progress(debt_import)
+    except (UnicodeDecodeError, csv.Error) as e:
+        debt_import.status = DebtImport.FAILED
+        debt_import.detail = f'Could not parse file: {e}'
+    except Exception:
+        # Batches already copied stay imported; processed_rows says how far it got.
+        debt_import.status = DebtImport.FAILED
+        debt_import.detail = f'Import stopped unexpectedly after {debt_import.processed_rows} rows.'
+        raise
+    else:
+        debt_import.status = DebtImport.COMPLETED
+    finally:
+        debt_import.finished_at = timezone.now()
+        debt_import.save(update_fields=['status', 'detail', 'finished_at'])
+
+    return debt_import
@@ -0,0 +1,112 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bills.models import Debt
+from bills.serializers import DEBT_READ_FIELDS, DebtSerializer, DebtValuesSerializer
+
+LIST_SCREEN_FIELDS = ['id', 'title', 'amount', 'due_date', 'status']
+
+
+def build_debts(count):
+    updated_at = timezone.now()
+    return [
+        Debt(
+            id=index,
+            title=f"Debt {index}",
+            amount=Decimal('1234.56'),
+            due_date=date(2025, 1, 1) + timedelta(days=index % 365),
+            status=Debt.STATUS_CHOICES[index % 3][0],
+            notes="Lorem ipsum dolor sit amet. " * 10,
+            user_id=1,
+            email_sent_for_due_soon=False,
+            category_id=9,
+            updated_at=updated_at,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def as_values(debt):
+    row = {field: getattr(debt, field) for field in DEBT_READ_FIELDS if field not in ('user', 'category')}
+    row.update(user=debt.user_id, category=debt.category_id)
+    return row
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row cost of DebtSerializer against the values() based "
+        "DebtValuesSerializer used by the debt list, for several page sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='10,100,500,1000')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--user', help="Username or id whose debts are also fetched from the database, query included."
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        repeat = options['repeat']
+
+        self.stdout.write("Serialization only (in-memory rows), microseconds per row:")
+        self.write_header()
+        for size in page_sizes:
+            debts = build_debts(size)
+            rows = [as_values(debt) for debt in debts]
+            self.write_row(
+                size,
+                best_of(repeat, lambda: DebtSerializer(debts, many=True).data),
+                best_of(repeat, lambda: DebtValuesSerializer(rows).data),
+                best_of(repeat, lambda: DebtValuesSerializer(rows, LIST_SCREEN_FIELDS).data),
+            )
+
+        if options['user']:
+            self.benchmark_database(options['user'], page_sizes, repeat)
+
+    def benchmark_database(self, user_option, page_sizes, repeat):
+        user_lookup = {'pk': user_option} if user_option.isdigit() else {'username': user_option}
+        try:
+            user = User.objects.get(**user_lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User {user_option} does not exist.")
+
+        debts = Debt.objects.filter(user=user).order_by('id')
+        available = debts.count()
+
+        self.stdout.write("")
+        self.stdout.write(f"Query and serialization ({available} debts available), microseconds per row:")
+        self.write_header()
+        for size in sorted({min(size, available) for size in page_sizes} - {0}):
+            self.write_row(
+                size,
+                best_of(repeat, lambda: DebtSerializer(debts[:size], many=True).data),
+                best_of(repeat, lambda: DebtValuesSerializer(debts.values(*DEBT_READ_FIELDS)[:size]).data),
+                best_of(
+                    repeat,
+                    lambda: DebtValuesSerializer(debts.values(*LIST_SCREEN_FIELDS)[:size], LIST_SCREEN_FIELDS).data,
+                ),
+            )
+
+    def write_header(self):
+        self.stdout.write(f"{'rows':>6} {'DebtSerializer':>15} {'values()':>10} {'?fields=':>10} {'speedup':>8}")
+
+    def write_row(self, size, full, lean, sparse):
+        self.stdout.write(
+            f"{size:>6} {full / size * 1e6:>15.2f} {lean / size * 1e6:>10.2f} {sparse / size * 1e6:>10.2f} "
+            f"{full / lean:>7.1f}x"
+        )
@@ -0,0 +1,71 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bills.models import Debt
+from bills.search import FULLTEXT, search_debts
+
+
+def find_sequential_scans(plan, relation):
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') == relation:
+        scans.append(plan)
+    for child in plan.get('Plans', []):
+        scans.extend(find_sequential_scans(child, relation))
+    return scans
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the Debt hot-path queries and fails if any of them "
+        "can only be answered with a sequential scan of bills_debt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, default=1)
+
+    def get_queries(self, user_id):
+        today = timezone.now().date()
+        tomorrow = today + timedelta(days=1)
+        debts = Debt.objects.filter(user_id=user_id)
+
+        return {
+            'debt list by status and period': debts.filter(
+                status=Debt.PENDING, due_date__gte=today, due_date__lte=today + timedelta(days=30)
+            ),
+            'financial summary': debts.only('status', 'amount'),
+            'full-text search': search_debts(Debt.objects.all(), 'aluguel', FULLTEXT),
+            'pending debts now overdue': Debt.objects.filter(status=Debt.PENDING, due_date__lt=today),
+            'pending debts due tomorrow': Debt.objects.filter(status=Debt.PENDING, due_date=tomorrow),
+            'due soon not yet notified': Debt.objects.filter(
+                status=Debt.PENDING, due_date=tomorrow, email_sent_for_due_soon=False
+            ),
+        }
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Query plans can only be checked against PostgreSQL.")
+
+        relation = Debt._meta.db_table
+        failures = []
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Small tables are always cheaper to scan; penalising sequential
+                # scans shows whether an index can serve the query at all.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in self.get_queries(options['user_id']).items():
+                plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+                if find_sequential_scans(plan, relation):
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"Seq Scan: {name}"))
+                    self.stdout.write(json.dumps(plan, indent=2))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"Indexed: {name}"))
+
+        if failures:
+            raise CommandError(f"Sequential scan on {relation} for: {', '.join(failures)}")
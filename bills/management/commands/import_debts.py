@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from bills.importers import IMPORT_BATCH_SIZE, guess_file_format, run_debt_import
+from bills.models import DebtImport
+
+
+class Command(BaseCommand):
+    help = "Imports debts for a user from a CSV or OFX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help="Username or id of the debts owner.")
+        parser.add_argument('--format', dest='file_format', choices=[DebtImport.CSV, DebtImport.OFX])
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        user_lookup = {'pk': options['user']} if options['user'].isdigit() else {'username': options['user']}
+        try:
+            user = User.objects.get(**user_lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+
+        path = options['path']
+        file_format = options['file_format'] or guess_file_format(path)
+        debt_import = DebtImport.objects.create(user=user, file_format=file_format)
+
+        def progress(current):
+            self.stdout.write(
+                f"{current.processed_rows} rows processed, {current.imported_rows} imported, "
+                f"{current.error_rows} rejected"
+            )
+
+        try:
+            with open(path, 'rb') as binary_file:
+                run_debt_import(debt_import, binary_file, batch_size=options['batch_size'], progress=progress)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in debt_import.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+
+        if debt_import.status == DebtImport.FAILED:
+            raise CommandError(debt_import.detail)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import {debt_import.pk} finished: {debt_import.imported_rows} debts imported, "
+            f"{debt_import.error_rows} rows rejected."
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:31
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("bills", "0004_debt_email_sent_for_due_soon"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="debt",
+            index=models.Index(
+                fields=["user", "status", "due_date"], name="debt_user_status_due_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="debt",
+            index=models.Index(
+                condition=models.Q(("status", "Pendente")),
+                fields=["due_date"],
+                name="debt_pending_due_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="debt",
+            index=models.Index(
+                condition=models.Q(
+                    ("email_sent_for_due_soon", False), ("status", "Pendente")
+                ),
+                fields=["due_date"],
+                name="debt_due_soon_unnotified_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("bills", "0005_debt_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="debt",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "title", config="portuguese", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "notes", config="portuguese", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("portuguese"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="debt",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="debt_search_vector_idx"
+            ),
+        ),
+    ]
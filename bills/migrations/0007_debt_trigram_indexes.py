@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("bills", "0006_debt_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="debt",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"),
+                    name="gin_trgm_ops",
+                ),
+                name="debt_title_trgm_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="debt",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("notes"),
+                    name="gin_trgm_ops",
+                ),
+                name="debt_notes_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:49
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bills", "0008_debtimport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="debt",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_default=django.db.models.functions.datetime.Now()
+            ),
+        ),
+    ]
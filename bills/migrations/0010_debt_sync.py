@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("bills", "0009_debt_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DebtTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("debt_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name="debt",
+            index=models.Index(
+                fields=["user", "updated_at", "id"], name="debt_user_updated_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="debttombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="debt_tombstones",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="debttombstone",
+            index=models.Index(
+                fields=["user", "deleted_at", "debt_id"], name="debt_tombstone_user_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:55
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bills", "0010_debt_sync"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="debt",
+            name="occurrence_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="RecurringDebt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("notes", models.TextField(blank=True, null=True)),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[("monthly", "Monthly"), ("weekly", "Weekly")],
+                        default="monthly",
+                        max_length=10,
+                    ),
+                ),
+                ("interval", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "day_of_month",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("count", models.PositiveIntegerField(blank=True, null=True)),
+                ("overdue_notified_through", models.DateField(blank=True, null=True)),
+                ("due_soon_notified_through", models.DateField(blank=True, null=True)),
+                (
+                    "search_vector",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=django.contrib.postgres.search.CombinedSearchVector(
+                            django.contrib.postgres.search.SearchVector(
+                                "title", config="portuguese", weight="A"
+                            ),
+                            "||",
+                            django.contrib.postgres.search.SearchVector(
+                                "notes", config="portuguese", weight="B"
+                            ),
+                            django.contrib.postgres.search.SearchConfig("portuguese"),
+                        ),
+                        output_field=django.contrib.postgres.search.SearchVectorField(),
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        default=9,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recurring_debts",
+                        to="bills.category",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recurring_debts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="debt",
+            name="recurrence",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="occurrences",
+                to="bills.recurringdebt",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="debt",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("recurrence__isnull", False)),
+                fields=("recurrence", "occurrence_date"),
+                name="unique_debt_occurrence",
+            ),
+        ),
+    ]
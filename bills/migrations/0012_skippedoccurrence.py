@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bills", "0011_recurringdebt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SkippedOccurrence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("occurrence_date", models.DateField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "recurrence",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skipped_occurrences",
+                        to="bills.recurringdebt",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("recurrence", "occurrence_date"),
+                        name="unique_skipped_occurrence",
+                    )
+                ],
+            },
+        ),
+    ]
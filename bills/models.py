@@ -1,5 +1,11 @@
+from calendar import monthrange
+from datetime import date, timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Now, Upper
 
 
 class Category(models.Model):
@@ -14,6 +20,88 @@ class Category(models.Model):
         ]
 
 
+class RecurringDebt(models.Model):
+    MONTHLY = 'monthly'
+    WEEKLY = 'weekly'
+
+    FREQUENCY_CHOICES = [
+        (MONTHLY, 'Monthly'),
+        (WEEKLY, 'Weekly'),
+    ]
+    SCHEDULE_FIELDS = ['frequency', 'interval', 'day_of_month', 'start_date', 'end_date', 'count']
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recurring_debts")
+    title = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    notes = models.TextField(null=True, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, default=9, related_name="recurring_debts")
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1)
+    day_of_month = models.PositiveSmallIntegerField(null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    overdue_notified_through = models.DateField(null=True, blank=True)
+    due_soon_notified_through = models.DateField(null=True, blank=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='portuguese')
+            + SearchVector('notes', weight='B', config='portuguese')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.title} - {self.amount} ({self.frequency})"
+
+    def occurrence_dates(self, start=None, end=None):
+        last = min(filter(None, [self.end_date, end]), default=None)
+        ordinal = 0
+        step = 0
+
+        while self.count is None or ordinal < self.count:
+            if self.frequency == self.WEEKLY:
+                occurrence = self.start_date + timedelta(weeks=step * self.interval)
+            else:
+                months = self.start_date.month - 1 + step * self.interval
+                year, month = self.start_date.year + months // 12, months % 12 + 1
+                day = min(self.day_of_month or self.start_date.day, monthrange(year, month)[1])
+                occurrence = date(year, month, day)
+            step += 1
+
+            if occurrence < self.start_date:
+                continue
+            if last is not None and occurrence > last:
+                return
+            ordinal += 1
+            if start is None or occurrence >= start:
+                yield ordinal, occurrence
+
+    def build_occurrence(self, ordinal, occurrence_date, today):
+        debt = Debt(
+            title=self.title,
+            amount=self.amount,
+            due_date=occurrence_date,
+            status=Debt.OVERDUE if occurrence_date < today else Debt.PENDING,
+            notes=self.notes,
+            user_id=self.user_id,
+            category_id=self.category_id,
+            recurrence=self,
+            occurrence_date=occurrence_date,
+            updated_at=self.updated_at,
+        )
+        debt.occurrence_ordinal = ordinal
+        return debt
+
+
+class DebtManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 class Debt(models.Model):
     PENDING = 'Pendente'
     PAID = 'Pago'
@@ -35,6 +123,112 @@ class Debt(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="debts")
     email_sent_for_due_soon = models.BooleanField(default=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, null=False, blank=False, default=9, related_name="debts")
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
+    recurrence = models.ForeignKey(
+        RecurringDebt, on_delete=models.SET_NULL, null=True, blank=True, related_name="occurrences"
+    )
+    occurrence_date = models.DateField(null=True, blank=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='portuguese')
+            + SearchVector('notes', weight='B', config='portuguese')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = DebtManager()
 
     def __str__(self):
         return f"{self.title} - {self.amount} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status', 'due_date'], name='debt_user_status_due_idx'),
+            models.Index(
+                fields=['due_date'],
+                name='debt_pending_due_idx',
+                condition=models.Q(status='Pendente'),
+            ),
+            models.Index(
+                fields=['due_date'],
+                name='debt_due_soon_unnotified_idx',
+                condition=models.Q(status='Pendente', email_sent_for_due_soon=False),
+            ),
+            GinIndex(fields=['search_vector'], name='debt_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='debt_title_trgm_idx'),
+            GinIndex(OpClass(Upper('notes'), name='gin_trgm_ops'), name='debt_notes_trgm_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='debt_user_updated_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recurrence', 'occurrence_date'],
+                condition=models.Q(recurrence__isnull=False),
+                name='unique_debt_occurrence',
+            ),
+        ]
+
+
+class SkippedOccurrence(models.Model):
+    recurrence = models.ForeignKey(RecurringDebt, on_delete=models.CASCADE, related_name="skipped_occurrences")
+    occurrence_date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.recurrence_id} skipped on {self.occurrence_date}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recurrence', 'occurrence_date'], name='unique_skipped_occurrence'),
+        ]
+
+
+class DebtTombstone(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="debt_tombstones")
+    debt_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Debt {self.debt_id} deleted at {self.deleted_at}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'debt_id'], name='debt_tombstone_user_idx'),
+        ]
+
+
+class DebtImport(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    CSV = 'csv'
+    OFX = 'ofx'
+
+    FORMAT_CHOICES = [
+        (CSV, 'CSV'),
+        (OFX, 'OFX'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="debt_imports")
+    file = models.FileField(upload_to='debt_imports/', null=True, blank=True)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    error_rows = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    detail = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.file_format} import {self.pk} ({self.status})"
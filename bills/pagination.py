@@ -0,0 +1,104 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .recurrence import DebtOccurrenceRows
+
+
+class DebtKeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = list(queryset.query.order_by)
+        position = self.decode_cursor(request)
+
+        if position is not None:
+            try:
+                position = self.parse_position(queryset.query, position)
+                if isinstance(queryset, DebtOccurrenceRows):
+                    queryset = queryset.seek(position, self.seek_filter(position))
+                else:
+                    queryset = queryset.filter(self.seek_filter(position))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def parse_position(self, query, position):
+        # Cursors come back from the client, so each value is read as the
+        # type of the field or annotation it orders by.
+        return [
+            query.resolve_ref(field.lstrip('-')).output_field.to_python(value)
+            for field, value in zip(self.ordering, position)
+        ]
+
+    def seek_filter(self, position):
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            field = field.lstrip('-')
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        if isinstance(last, dict):
+            position = [last[field.lstrip('-')] for field in self.ordering]
+        else:
+            position = [getattr(last, field.lstrip('-')) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def encode_cursor(self, position):
+        return b64encode(json.dumps(position, cls=DjangoJSONEncoder).encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            position = json.loads(b64decode(encoded.encode('ascii')))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position
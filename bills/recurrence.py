@@ -0,0 +1,207 @@
+import heapq
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .filters import get_debt_period, get_debt_status, search_queryset
+from .models import Debt, RecurringDebt, SkippedOccurrence
+
+RECURRING_DEBTS_HORIZON = timedelta(days=settings.RECURRING_DEBTS_HORIZON_DAYS)
+DISTANT_FUTURE = date(9999, 12, 31)
+
+
+# starts maps recurrence ids to a start of their own, used instead of start.
+def expand_occurrences(recurrences, start, end, today, starts=None):
+    starts = starts or {}
+    candidates = [
+        (recurrence, ordinal, occurrence_date)
+        for recurrence in recurrences
+        for ordinal, occurrence_date in recurrence.occurrence_dates(starts.get(recurrence.id, start), end)
+    ]
+    if not candidates:
+        return []
+
+    # Materialized occurrences are listed as debts and skipped ones, such as
+    # those whose debt was deleted, are not listed at all.
+    lookup = {
+        'recurrence__in': {recurrence.id for recurrence, _, _ in candidates},
+        'occurrence_date__gte': min(occurrence_date for _, _, occurrence_date in candidates),
+        'occurrence_date__lte': max(occurrence_date for _, _, occurrence_date in candidates),
+    }
+    taken = set(
+        Debt.objects.filter(**lookup).values_list('recurrence_id', 'occurrence_date').union(
+            SkippedOccurrence.objects.filter(**lookup).values_list('recurrence_id', 'occurrence_date')
+        )
+    )
+
+    return [
+        recurrence.build_occurrence(ordinal, occurrence_date, today)
+        for recurrence, ordinal, occurrence_date in candidates
+        if (recurrence.id, occurrence_date) not in taken
+    ]
+
+
+def user_occurrences(user_id, today, start=None, end=None):
+    recurrences = RecurringDebt.objects.filter(user_id=user_id).defer('search_vector')
+    return expand_occurrences(recurrences, start, end or today + RECURRING_DEBTS_HORIZON, today)
+
+
+def list_occurrences(user, query_params, today):
+    start, end = get_debt_period(query_params)
+    debt_status = get_debt_status(query_params)
+
+    # Occurrences that are not materialized yet were never paid.
+    if debt_status == Debt.PAID:
+        return []
+
+    end = end or today + RECURRING_DEBTS_HORIZON
+    if debt_status == Debt.OVERDUE:
+        end = min(end, today - timedelta(days=1))
+    elif debt_status == Debt.PENDING:
+        start = max(start or today, today)
+    if start and start > end:
+        return []
+
+    recurrences = search_queryset(RecurringDebt.objects.filter(user=user), query_params)
+    recurrences = recurrences.filter(start_date__lte=end).defer('search_vector')
+    if start:
+        recurrences = recurrences.exclude(end_date__lt=start)
+
+    return expand_occurrences(recurrences, start, end, today)
+
+
+def materialize_occurrence(recurrence, occurrence_date, changes, today):
+    occurrence = recurrence.build_occurrence(0, occurrence_date, today)
+    # The pending debts task already warned about this occurrence, if it was due.
+    occurrence.email_sent_for_due_soon = bool(
+        recurrence.due_soon_notified_through and occurrence_date <= recurrence.due_soon_notified_through
+    )
+
+    with transaction.atomic():
+        SkippedOccurrence.objects.filter(recurrence=recurrence, occurrence_date=occurrence_date).delete()
+        debt, created = Debt.objects.select_for_update().get_or_create(
+            recurrence=recurrence,
+            occurrence_date=occurrence_date,
+            defaults={
+                field: getattr(occurrence, field)
+                for field in ['title', 'amount', 'due_date', 'status', 'notes', 'user_id', 'category_id',
+                              'email_sent_for_due_soon']
+            },
+        )
+        if changes:
+            for field, value in changes.items():
+                setattr(debt, field, value)
+            debt.save()
+
+    return debt, created
+
+
+def skip_occurrence(recurrence, occurrence_date):
+    with transaction.atomic():
+        SkippedOccurrence.objects.bulk_create(
+            [SkippedOccurrence(recurrence=recurrence, occurrence_date=occurrence_date)], ignore_conflicts=True
+        )
+        Debt.objects.filter(recurrence=recurrence, occurrence_date=occurrence_date).delete()
+
+
+def occurrence_row(debt):
+    # Mirrors the ordering annotations of DebtListView.get_queryset().
+    return {
+        'id': -(debt.recurrence_id * 10 ** 6 + debt.occurrence_ordinal),
+        'title': debt.title,
+        'amount': debt.amount,
+        'due_date': debt.due_date,
+        'status': debt.status,
+        'notes': debt.notes,
+        'user': debt.user_id,
+        'email_sent_for_due_soon': debt.email_sent_for_due_soon,
+        'category': debt.category_id,
+        'updated_at': debt.updated_at,
+        'recurrence': debt.recurrence_id,
+        'occurrence_date': debt.occurrence_date,
+        'overdue_priority': debt.due_date if debt.status == Debt.OVERDUE else DISTANT_FUTURE,
+        'upcoming_priority': debt.due_date if debt.status == Debt.PENDING else DISTANT_FUTURE,
+        'search_rank': getattr(debt.recurrence, 'search_rank', None),
+    }
+
+
+class _Descending:
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _comparable(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+# Merges the values() rows of a debt queryset with expanded recurring
+# occurrences in the queryset ordering, so both can be counted, sliced and
+# paginated together. Occurrences carry negative ids, which keeps keyset
+# cursors over the id valid.
+class DebtOccurrenceRows:
+    ordered = True
+
+    def __init__(self, queryset, occurrence_rows):
+        self.queryset = queryset
+        self.query = queryset.query
+        self.ordering = list(queryset.query.order_by)
+        self.occurrence_rows = sorted(occurrence_rows, key=self.position_key)
+        self._db_count = None
+
+    def position_key(self, position):
+        if isinstance(position, dict):
+            position = [position[field.lstrip('-')] for field in self.ordering]
+        return tuple(
+            _Descending(_comparable(value)) if field.startswith('-') else _comparable(value)
+            for field, value in zip(self.ordering, position)
+        )
+
+    def seek(self, position, condition):
+        key = self.position_key(position)
+        return DebtOccurrenceRows(
+            self.queryset.filter(condition), [row for row in self.occurrence_rows if self.position_key(row) > key]
+        )
+
+    def db_count(self):
+        if self._db_count is None:
+            self._db_count = self.queryset.count()
+        return self._db_count
+
+    def count(self):
+        return self.db_count() + len(self.occurrence_rows)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step:
+            raise TypeError('DebtOccurrenceRows only supports slicing.')
+
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        if not self.occurrence_rows:
+            return list(self.queryset[start:stop])
+
+        # Every row before `start` is either an occurrence or one of the
+        # db_start database rows skipped here.
+        db_start = 0
+        if start > len(self.occurrence_rows):
+            db_start = max(0, min(start - len(self.occurrence_rows), self.db_count() - 1))
+        db_rows = list(self.queryset[db_start:stop])
+
+        before, after = [], self.occurrence_rows
+        if db_start and db_rows:
+            first = self.position_key(db_rows[0])
+            before = [row for row in self.occurrence_rows if self.position_key(row) < first]
+            after = self.occurrence_rows[len(before):]
+
+        offset = db_start + len(before)
+        merged = list(heapq.merge(db_rows, after, key=self.position_key))
+        return merged[start - offset:stop - offset]
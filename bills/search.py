@@ -0,0 +1,25 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+SEARCH_CONFIG = 'portuguese'
+
+FULLTEXT = 'fulltext'
+SUBSTRING = 'substring'
+SEARCH_MODES = [FULLTEXT, SUBSTRING]
+
+
+def search_debts(queryset, search, mode=FULLTEXT):
+    if mode not in SEARCH_MODES:
+        raise ValidationError("Invalid search_mode value. Valid options are: fulltext, substring.")
+
+    if mode == SUBSTRING:
+        return queryset.filter(Q(title__icontains=search) | Q(notes__icontains=search))
+
+    query = SearchQuery(search, config=SEARCH_CONFIG, search_type='websearch')
+    # ts_rank returns a float4; widen it so the value survives the round
+    # trip through keyset pagination cursors unchanged.
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
@@ -1,17 +1,104 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Category, Debt
+from rest_framework.exceptions import ValidationError
 
+from FINANCE_CORE.metrics import observe_serializer
 
-class CategorySerializer(serializers.ModelSerializer):
+from .categories import CachedCategoryField
+from .models import Category, Debt, DebtImport, RecurringDebt
+
+
+class InstrumentedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with observe_serializer(type(self.child).__name__):
+            return super().data
+
+
+# Records how long building the output takes; many=True goes through the
+# list_serializer_class set in Meta.
+class InstrumentedSerializerMixin:
+    @property
+    def data(self):
+        with observe_serializer(type(self).__name__):
+            return super().data
+
+
+class CategorySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
+        list_serializer_class = InstrumentedListSerializer
 
 
-class DebtSerializer(serializers.ModelSerializer):
+class DebtSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Debt
-        fields = '__all__'
+        exclude = ['search_vector']
+        list_serializer_class = InstrumentedListSerializer
+
+    category = CachedCategoryField(required=False)
+
+
+DEBT_READ_FIELDS = [
+    'id', 'title', 'amount', 'due_date', 'status', 'notes', 'user', 'email_sent_for_due_soon', 'category',
+    'updated_at', 'recurrence', 'occurrence_date',
+]
+
+
+def parse_debt_fields(query_params):
+    requested = query_params.get('fields')
+    if not requested:
+        return DEBT_READ_FIELDS
+
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    unknown = names - set(DEBT_READ_FIELDS)
+    if unknown:
+        raise ValidationError({
+            'fields': (
+                f"Unknown fields: {', '.join(sorted(unknown))}. "
+                f"Valid options are: {', '.join(DEBT_READ_FIELDS)}."
+            )
+        })
+
+    # The id is always returned so clients can address the rows they get back.
+    return [name for name in DEBT_READ_FIELDS if name == 'id' or name in names]
+
+
+def _format_datetime(value):
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+DEBT_VALUE_FORMATTERS = {
+    # Recurring occurrences that were not materialized have no row of their own.
+    'id': lambda value: value if value > 0 else None,
+    'amount': lambda value: format(value, 'f'),
+    'due_date': lambda value: value.isoformat(),
+    'updated_at': _format_datetime,
+    'occurrence_date': lambda value: value.isoformat(),
+}
+
+
+# Builds the same output as DebtSerializer straight from values() rows.
+class DebtValuesSerializer:
+    def __init__(self, rows, fields=DEBT_READ_FIELDS):
+        self.rows = rows
+        self.fields = fields
+
+    @property
+    def data(self):
+        formatters = [(field, DEBT_VALUE_FORMATTERS.get(field)) for field in self.fields]
+        with observe_serializer(type(self).__name__):
+            return [
+                {
+                    field: formatter(row[field]) if formatter and row[field] is not None else row[field]
+                    for field, formatter in formatters
+                }
+                for row in self.rows
+            ]
 
 
 class CreateDebtSerializer(serializers.ModelSerializer):
@@ -20,3 +107,96 @@ class CreateDebtSerializer(serializers.ModelSerializer):
         fields = ['title', 'amount', 'due_date', 'status', 'notes', 'category']
 
     notes = serializers.CharField(required=False, allow_blank=True, default=None)
+    category = CachedCategoryField(required=False)
+
+
+class BulkDebtDataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Debt
+        fields = ['title', 'amount', 'due_date', 'status', 'notes', 'category']
+
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None)
+    category = CachedCategoryField(required=False)
+
+
+class BulkDebtOperationSerializer(serializers.Serializer):
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    op = serializers.ChoiceField(choices=[CREATE, UPDATE, DELETE])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] in (self.UPDATE, self.DELETE) and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'This field is required.'})
+        if attrs['op'] in (self.CREATE, self.UPDATE) and 'data' not in attrs:
+            raise serializers.ValidationError({'data': 'This field is required.'})
+        return attrs
+
+
+class DebtImportSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DebtImport
+        fields = [
+            'id', 'file_format', 'status', 'processed_rows', 'imported_rows',
+            'error_rows', 'errors', 'detail', 'created_at', 'finished_at',
+        ]
+        list_serializer_class = InstrumentedListSerializer
+
+
+class RecurringDebtSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = RecurringDebt
+        fields = [
+            'id', 'title', 'amount', 'notes', 'category', 'frequency', 'interval', 'day_of_month',
+            'start_date', 'end_date', 'count', 'created_at', 'updated_at',
+        ]
+        list_serializer_class = InstrumentedListSerializer
+
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None)
+    category = CachedCategoryField(required=False)
+    interval = serializers.IntegerField(required=False, min_value=1, max_value=366)
+    day_of_month = serializers.IntegerField(required=False, allow_null=True, min_value=1, max_value=31)
+    count = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+
+    def validate(self, attrs):
+        frequency = attrs.get('frequency', getattr(self.instance, 'frequency', RecurringDebt.MONTHLY))
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+
+        if frequency == RecurringDebt.WEEKLY and attrs.get('day_of_month'):
+            raise serializers.ValidationError({'day_of_month': 'Only monthly recurrences have a day of month.'})
+        if end_date and start_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'The end date must not be before the start date.'})
+        return attrs
+
+    def update(self, instance, validated_data):
+        # The markers hold dates of the old schedule; a new one is checked from
+        # its start, like a recurrence that was just created.
+        if any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in RecurringDebt.SCHEDULE_FIELDS
+        ):
+            validated_data['overdue_notified_through'] = None
+            validated_data['due_soon_notified_through'] = None
+        return super().update(instance, validated_data)
+
+
+class DebtOccurrenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Debt
+        fields = ['occurrence_date', 'title', 'amount', 'status', 'notes', 'category']
+
+    occurrence_date = serializers.DateField()
+    title = serializers.CharField(required=False, max_length=255)
+    amount = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    category = CachedCategoryField(required=False)
+
+    def validate_occurrence_date(self, value):
+        recurrence = self.context['recurrence']
+        if not any(True for _ in recurrence.occurrence_dates(value, value)):
+            raise serializers.ValidationError('This date is not an occurrence of the recurring debt.')
+        return value
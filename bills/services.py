@@ -0,0 +1,285 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Count, Q, Sum
+
+from FINANCE_CORE.routers import aprimary_if_pinned, pin_to_primary, primary_if_pinned
+
+from .categories import category_cache
+from .models import Debt, DebtTombstone, SkippedOccurrence
+from .recurrence import user_occurrences
+from .serializers import BulkDebtDataSerializer, BulkDebtOperationSerializer
+
+FINANCIAL_SUMMARY_CACHE_KEY = "bills:financial_summary:{user_id}:{day}:{version}"
+FINANCIAL_SUMMARY_CACHE_TIMEOUT = 60 * 60 * 24
+DEBT_VERSION_CACHE_KEY = "bills:debts:version:{user_id}"
+
+
+# Keyed by the debt version, so a summary computed from rows older than a
+# change lands under a key nobody reads anymore, and by day: recurring
+# occurrences change status and enter the horizon as days go by.
+def _financial_summary_cache_key(user_id, version):
+    return FINANCIAL_SUMMARY_CACHE_KEY.format(user_id=user_id, day=timezone.localdate().isoformat(), version=version)
+
+
+def _financial_summary_aggregates():
+    paid = Q(status=Debt.PAID)
+    overdue = Q(status=Debt.OVERDUE)
+    pending = Q(status=Debt.PENDING)
+
+    return {
+        'total_debts': Count('id'),
+        'total_debts_amount_sum': Sum('amount'),
+        'total_paid_debts': Count('id', filter=paid),
+        'total_paid_debts_sum': Sum('amount', filter=paid),
+        'total_overdue_debts': Count('id', filter=overdue),
+        'total_overdue_debts_sum': Sum('amount', filter=overdue),
+        'total_pending_debts': Count('id', filter=pending),
+        'total_pending_debts_sum': Sum('amount', filter=pending),
+    }
+
+
+def _financial_summary(totals, occurrences):
+    totals = {key: value or 0 for key, value in totals.items()}
+
+    for debt in occurrences:
+        prefix = 'total_overdue_debts' if debt.status == Debt.OVERDUE else 'total_pending_debts'
+        totals['total_debts'] += 1
+        totals['total_debts_amount_sum'] += debt.amount
+        totals[prefix] += 1
+        totals[f'{prefix}_sum'] += debt.amount
+
+    return totals
+
+
+def compute_financial_summary(user_id):
+    totals = Debt.objects.filter(user_id=user_id).aggregate(**_financial_summary_aggregates())
+    return _financial_summary(totals, user_occurrences(user_id, timezone.localdate()))
+
+
+async def acompute_financial_summary(user_id):
+    totals = await Debt.objects.filter(user_id=user_id).aaggregate(**_financial_summary_aggregates())
+    # Expanding the recurrences checks which occurrences were materialized,
+    # which has no async counterpart yet.
+    occurrences = await sync_to_async(user_occurrences)(user_id, timezone.localdate())
+    return _financial_summary(totals, occurrences)
+
+
+def get_financial_summary(user_id):
+    key = _financial_summary_cache_key(user_id, get_debt_version(user_id))
+    financial_summary = cache.get(key)
+
+    if financial_summary is None:
+        with primary_if_pinned(user_id):
+            financial_summary = compute_financial_summary(user_id)
+        cache.set(key, financial_summary, FINANCIAL_SUMMARY_CACHE_TIMEOUT)
+
+    return financial_summary
+
+
+async def aget_financial_summary(user_id):
+    key = _financial_summary_cache_key(user_id, await aget_debt_version(user_id))
+    financial_summary = await cache.aget(key)
+
+    if financial_summary is None:
+        with await aprimary_if_pinned(user_id):
+            financial_summary = await acompute_financial_summary(user_id)
+        await cache.aset(key, financial_summary, FINANCIAL_SUMMARY_CACHE_TIMEOUT)
+
+    return financial_summary
+
+
+def invalidate_financial_summary(*user_ids):
+    if user_ids:
+        cache.delete_many([
+            _financial_summary_cache_key(user_id, get_debt_version(user_id)) for user_id in set(user_ids)
+        ])
+
+
+def get_debt_version(user_id):
+    key = DEBT_VERSION_CACHE_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Unknown versions start from "now", so clients holding an older one refetch.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_debt_version(user_id):
+    key = DEBT_VERSION_CACHE_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def debt_version_modified_at(version):
+    return datetime.fromtimestamp(version // 10 ** 9, tz=dt_timezone.utc)
+
+
+def bump_debt_versions(*user_ids):
+    if user_ids:
+        version = time.time_ns()
+        cache.set_many({DEBT_VERSION_CACHE_KEY.format(user_id=user_id): version for user_id in set(user_ids)}, None)
+
+
+# Pinned before the version moves: a request that sees the new version also
+# sees the pin. Moving the version retires the cached summaries with it.
+def debts_changed(*user_ids):
+    pin_to_primary(*user_ids)
+    bump_debt_versions(*user_ids)
+
+
+# The midnight run of check_pending_debts only sees the debts that were due
+# by then; one created or moved to today, tomorrow or the past is checked as
+# soon as it is committed.
+def due_date_check_needed(debt_status, due_date, today):
+    return debt_status == Debt.PENDING and due_date is not None and due_date <= today + timedelta(days=1)
+
+
+def schedule_due_date_checks(user_ids=(), recurrence_ids=()):
+    from FINANCE_CORE.tasks import check_due_debts
+
+    if not user_ids and not recurrence_ids:
+        return
+
+    user_ids, recurrence_ids = sorted(set(user_ids)), sorted(set(recurrence_ids))
+    transaction.on_commit(lambda: check_due_debts.delay(user_ids, recurrence_ids), robust=True)
+
+
+BULK_DEBT_MAX_OPERATIONS = 1000
+
+
+def _parse_bulk_debt_operations(operations):
+    results = []
+    pending = []
+    seen_ids = set()
+
+    for index, raw_operation in enumerate(operations):
+        operation_serializer = BulkDebtOperationSerializer(data=raw_operation)
+        if not operation_serializer.is_valid():
+            results.append({'index': index, 'status': 'error', 'errors': operation_serializer.errors})
+            continue
+
+        operation = operation_serializer.validated_data
+        result = {'index': index, 'op': operation['op']}
+        results.append(result)
+
+        if operation['op'] != BulkDebtOperationSerializer.CREATE:
+            if operation['id'] in seen_ids:
+                result.update(status='error', id=operation['id'], errors={'id': ['Duplicated operation.']})
+                continue
+            seen_ids.add(operation['id'])
+
+        if operation['op'] != BulkDebtOperationSerializer.DELETE:
+            data_serializer = BulkDebtDataSerializer(
+                data=operation['data'], partial=operation['op'] == BulkDebtOperationSerializer.UPDATE
+            )
+            if not data_serializer.is_valid():
+                result.update(status='error', errors=data_serializer.errors)
+                continue
+            operation['data'] = data_serializer.validated_data
+            if operation['op'] == BulkDebtOperationSerializer.CREATE and 'category' not in operation['data']:
+                default_category_id = Debt._meta.get_field('category').get_default()
+                operation['data']['category'] = category_cache.get(default_category_id)
+                if operation['data']['category'] is None:
+                    message = f'Invalid pk "{default_category_id}" - object does not exist.'
+                    result.update(status='error', errors={'category': [message]})
+                    continue
+
+        pending.append((result, operation))
+
+    return results, pending
+
+
+def _resolve_bulk_debt_operations(user, pending):
+    existing = Debt.objects.filter(user=user).in_bulk(
+        [operation['id'] for _, operation in pending if operation['op'] != BulkDebtOperationSerializer.CREATE]
+    )
+
+    resolved = []
+    for result, operation in pending:
+        if operation['op'] != BulkDebtOperationSerializer.CREATE and operation['id'] not in existing:
+            result.update(status='error', id=operation['id'], errors={'id': ['Not found.']})
+            continue
+
+        data = dict(operation.get('data', {}))
+        if operation['op'] == BulkDebtOperationSerializer.CREATE:
+            debt = Debt(user=user, **data)
+        else:
+            debt = existing[operation['id']]
+            for field, value in data.items():
+                setattr(debt, field, value)
+
+        resolved.append((result, operation['op'], debt, data.keys()))
+
+    return resolved
+
+
+def record_deleted_debts(debts):
+    DebtTombstone.objects.bulk_create(
+        [DebtTombstone(user_id=debt.user_id, debt_id=debt.id) for debt in debts], batch_size=500
+    )
+    # A deleted occurrence must not come back as an unpaid one.
+    SkippedOccurrence.objects.bulk_create(
+        [
+            SkippedOccurrence(recurrence_id=debt.recurrence_id, occurrence_date=debt.occurrence_date)
+            for debt in debts
+            if debt.recurrence_id is not None
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def apply_bulk_debt_operations(user, operations):
+    results, pending = _parse_bulk_debt_operations(operations)
+    resolved = _resolve_bulk_debt_operations(user, pending)
+
+    if any(result.get('status') == 'error' for result in results):
+        for result in results:
+            result.setdefault('status', 'skipped')
+        return results, False
+
+    to_create = [debt for _, op, debt, _ in resolved if op == BulkDebtOperationSerializer.CREATE]
+    to_update = [debt for _, op, debt, _ in resolved if op == BulkDebtOperationSerializer.UPDATE]
+    to_delete = [debt for _, op, debt, _ in resolved if op == BulkDebtOperationSerializer.DELETE]
+    update_fields = sorted({
+        field for _, op, _, fields in resolved if op == BulkDebtOperationSerializer.UPDATE for field in fields
+    })
+
+    with transaction.atomic():
+        Debt.objects.bulk_create(to_create, batch_size=500)
+        if to_update and update_fields:
+            # bulk_update() does not apply auto_now, so stamp the rows here.
+            updated_at = timezone.now()
+            for debt in to_update:
+                debt.updated_at = updated_at
+            Debt.objects.bulk_update(to_update, update_fields + ['updated_at'], batch_size=500)
+        if to_delete:
+            # delete() would send post_delete, one tombstone INSERT per row;
+            # nothing references debts, so the rows can go in one statement.
+            deleted = Debt.objects.filter(id__in=[debt.id for debt in to_delete])
+            deleted._raw_delete(deleted.db)
+            record_deleted_debts(to_delete)
+        transaction.on_commit(lambda: debts_changed(user.id))
+
+        today = timezone.localdate()
+        if any(due_date_check_needed(debt.status, debt.due_date, today) for debt in to_create + to_update):
+            schedule_due_date_checks(user_ids=[user.id])
+
+    statuses = {
+        BulkDebtOperationSerializer.CREATE: 'created',
+        BulkDebtOperationSerializer.UPDATE: 'updated',
+        BulkDebtOperationSerializer.DELETE: 'deleted',
+    }
+    for result, op, debt, _ in resolved:
+        result.update(status=statuses[op], id=debt.id)
+
+    return results, True
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .categories import bump_category_version
+from .models import Category, Debt, RecurringDebt
+from .services import debts_changed, due_date_check_needed, record_deleted_debts, schedule_due_date_checks
+
+
+@receiver(post_save, sender=Debt)
+@receiver(post_delete, sender=Debt)
+@receiver(post_save, sender=RecurringDebt)
+@receiver(post_delete, sender=RecurringDebt)
+def debt_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: debts_changed(user_id))
+
+
+@receiver(post_save, sender=Debt)
+def debt_saved(sender, instance, **kwargs):
+    if due_date_check_needed(instance.status, instance.due_date, timezone.localdate()):
+        schedule_due_date_checks(user_ids=[instance.user_id])
+
+
+@receiver(post_save, sender=RecurringDebt)
+def recurring_debt_saved(sender, instance, **kwargs):
+    if instance.start_date <= timezone.localdate() + timedelta(days=1):
+        schedule_due_date_checks(recurrence_ids=[instance.id])
+
+
+@receiver(post_delete, sender=Debt)
+def debt_deleted(sender, instance, origin=None, **kwargs):
+    # Nobody is left to sync with when the whole account goes away.
+    if isinstance(origin, User):
+        return
+    record_deleted_debts([instance])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_category_version)
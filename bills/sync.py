@@ -0,0 +1,111 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .errors import SyncTokenExpired
+from .models import Debt, DebtTombstone
+
+DEBT_SYNC_PAGE_SIZE = settings.DEBT_SYNC_PAGE_SIZE
+# Rows are stamped before their transaction commits, so only rows stamped up to
+# "now - lag" are sent and the cursor never moves past it; later ones wait for
+# the next sync, behind any late commit stamped before them.
+DEBT_SYNC_LAG = timedelta(seconds=settings.DEBT_SYNC_LAG_SECONDS)
+DEBT_SYNC_TOMBSTONE_RETENTION = timedelta(days=settings.DEBT_SYNC_TOMBSTONE_RETENTION_DAYS)
+
+INVALID_SYNC_TOKEN = 'Invalid sync token.'
+
+
+def encode_sync_token(changes_position, deleted_position):
+    payload = {
+        'changes': _dump_position(changes_position),
+        'deleted': _dump_position(deleted_position),
+    }
+    return urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+
+
+def decode_sync_token(token):
+    try:
+        payload = json.loads(urlsafe_b64decode(token.encode('ascii')))
+        return _load_position(payload['changes']), _load_position(payload['deleted'])
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError({'since': INVALID_SYNC_TOKEN})
+
+
+def _dump_position(position):
+    if position is None:
+        return None
+    timestamp, pk = position
+    # isoformat() keeps microseconds, which DjangoJSONEncoder would truncate.
+    return [timestamp.isoformat(), pk]
+
+
+def _load_position(position):
+    if position is None:
+        return None
+    timestamp, pk = position
+    timestamp = parse_datetime(timestamp)
+    if timestamp is None or timezone.is_naive(timestamp) or not isinstance(pk, int):
+        raise ValueError
+    return timestamp, pk
+
+
+def _seek(queryset, timestamp_field, pk_field, position):
+    queryset = queryset.order_by(timestamp_field, pk_field)
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(
+        Q(**{f'{timestamp_field}__gt': timestamp}) | Q(**{timestamp_field: timestamp, f'{pk_field}__gt': pk})
+    )
+
+
+def _next_position(items, timestamp_field, pk_field, position, has_more, horizon):
+    if items:
+        last = items[-1]
+        position = (getattr(last, timestamp_field), getattr(last, pk_field))
+    # Everything up to the horizon was sent, so a caught up cursor moves to it.
+    if not has_more and (position is None or position[0] < horizon):
+        position = (horizon, 0)
+    return position
+
+
+def get_debt_changes(user, token=None, page_size=DEBT_SYNC_PAGE_SIZE):
+    now = timezone.now()
+    horizon = now - DEBT_SYNC_LAG
+
+    if token is None:
+        # A first sync downloads every debt; deletions before it are irrelevant.
+        changes_position, deleted_position = None, (horizon, 0)
+    else:
+        changes_position, deleted_position = decode_sync_token(token)
+        if deleted_position[0] < now - DEBT_SYNC_TOMBSTONE_RETENTION:
+            raise SyncTokenExpired()
+
+    debts = Debt.objects.filter(user=user, updated_at__lte=horizon)
+    tombstones = DebtTombstone.objects.filter(user=user, deleted_at__lte=horizon).only('deleted_at', 'debt_id')
+    debts = list(_seek(debts, 'updated_at', 'id', changes_position)[:page_size + 1])
+    tombstones = list(_seek(tombstones, 'deleted_at', 'debt_id', deleted_position)[:page_size + 1])
+
+    more_debts = len(debts) > page_size
+    more_tombstones = len(tombstones) > page_size
+    debts = debts[:page_size]
+    tombstones = tombstones[:page_size]
+
+    next_token = encode_sync_token(
+        _next_position(debts, 'updated_at', 'id', changes_position, more_debts, horizon),
+        _next_position(tombstones, 'deleted_at', 'debt_id', deleted_position, more_tombstones, horizon),
+    )
+
+    return debts, [tombstone.debt_id for tombstone in tombstones], next_token, more_debts or more_tombstones
+
+
+def prune_tombstones(now=None):
+    cutoff = (now or timezone.now()) - DEBT_SYNC_TOMBSTONE_RETENTION
+    deleted, _ = DebtTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,29 @@
+from celery import shared_task
+
+from .importers import run_debt_import
+from .models import DebtImport
+from .sync import prune_tombstones
+
+
+@shared_task(bind=True)
+def import_debts_file(self, import_id):
+    debt_import = DebtImport.objects.get(pk=import_id)
+
+    def progress(current):
+        if self.request.is_eager:
+            return
+        self.update_state(state='PROGRESS', meta={
+            'processed_rows': current.processed_rows,
+            'imported_rows': current.imported_rows,
+            'error_rows': current.error_rows,
+        })
+
+    with debt_import.file.open('rb') as binary_file:
+        run_debt_import(debt_import, binary_file, progress=progress)
+
+    return f"{debt_import.imported_rows} debts imported and {debt_import.error_rows} rows rejected."
+
+
+@shared_task
+def prune_debt_tombstones():
+    return f"{prune_tombstones()} debt tombstones pruned."
@@ -1,17 +1,39 @@
 from django.urls import path
 from .views import (
     DebtListView,
+    DebtBulkView,
+    DebtExportView,
+    DebtSyncView,
+    DebtImportView,
+    DebtImportDetailView,
     DebtDetailView,
     CategoryListView,
-    CategoryDetailView, MeApi
+    CategoryDetailView, MeApi,
+    ForecastView,
+    RecurringDebtListView,
+    RecurringDebtDetailView,
+    RecurringDebtOccurrenceView,
 )
 
 app_name = "authorizer"
 
 urlpatterns = [
     path('me/', MeApi.as_view(), name='me'),
+    path('forecast/', ForecastView.as_view(), name='forecast'),
     path('debts/', DebtListView.as_view(), name='debt-list'),
+    path('debts/bulk/', DebtBulkView.as_view(), name='debt-bulk'),
+    path('debts/export/', DebtExportView.as_view(), name='debt-export'),
+    path('debts/sync/', DebtSyncView.as_view(), name='debt-sync'),
+    path('debts/import/', DebtImportView.as_view(), name='debt-import'),
+    path('debts/import/<int:pk>/', DebtImportDetailView.as_view(), name='debt-import-detail'),
     path('debts/<int:pk>/', DebtDetailView.as_view(), name='debt-detail'),
+    path('recurring-debts/', RecurringDebtListView.as_view(), name='recurring-debt-list'),
+    path('recurring-debts/<int:pk>/', RecurringDebtDetailView.as_view(), name='recurring-debt-detail'),
+    path(
+        'recurring-debts/<int:pk>/occurrences/',
+        RecurringDebtOccurrenceView.as_view(),
+        name='recurring-debt-occurrence',
+    ),
 
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
@@ -1,58 +1,163 @@
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
 
-from django.db import DatabaseError
-from django.db.models import Sum, Q, Value, Case, When, DateField, F
+from adrf.generics import aget_object_or_404
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, transaction
+from django.db.models import Value, Case, When, DateField, F
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.views.decorators.http import etag
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Debt, Category
-from .serializers import DebtSerializer, CategorySerializer, CreateDebtSerializer
+from FINANCE_CORE.routers import read_database, replica_reads
+
+from .categories import category_cache
+from .errors import PreconditionFailed
+from .exports import CSV, EXPORT_FORMATS, EXPORT_STREAMS, AsyncExportStream
+from .filters import filter_debts, is_ranked_search
+from .forecast import get_forecast, parse_forecast_params
+from .importers import IMPORT_INLINE_MAX_BYTES, ROW_PARSERS, guess_file_format, run_debt_import
+from .models import Debt, DebtImport, Category, RecurringDebt
+from .pagination import DebtKeysetPagination
+from .recurrence import DebtOccurrenceRows, list_occurrences, materialize_occurrence, occurrence_row, skip_occurrence
+from .serializers import (
+    CategorySerializer,
+    CreateDebtSerializer,
+    DebtImportSerializer,
+    DebtOccurrenceSerializer,
+    DebtSerializer,
+    DebtValuesSerializer,
+    RecurringDebtSerializer,
+    parse_debt_fields,
+)
+from .services import (
+    BULK_DEBT_MAX_OPERATIONS,
+    apply_bulk_debt_operations,
+    aget_debt_version,
+    aget_financial_summary,
+    debt_version_modified_at,
+)
+from .sync import get_debt_changes
+from .tasks import import_debts_file
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
 
-class DebtListView(generics.ListCreateAPIView):
+async def _debt_list_version(request):
+    if not hasattr(request, '_debt_list_version'):
+        request._debt_list_version = await aget_debt_version(request.user.id)
+    return request._debt_list_version
+
+
+# Recurring occurrences turn overdue and enter the listed window as days go
+# by, so list validators also change at midnight.
+async def debt_list_etag(request, *args, **kwargs):
+    return f'"debts-{request.user.id}-{await _debt_list_version(request)}-{timezone.localdate():%Y%m%d}"'
+
+
+async def debt_list_last_modified(request, *args, **kwargs):
+    midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(debt_version_modified_at(await _debt_list_version(request)), midnight)
+
+
+def debt_etag(pk, updated_at):
+    return f'"debt-{pk}-{updated_at.astimezone(dt_timezone.utc):%Y%m%d%H%M%S%f}"'
+
+
+async def _debt_updated_at(request, pk):
+    if not hasattr(request, '_debt_updated_at'):
+        request._debt_updated_at = await (
+            Debt.objects.filter(user=request.user, pk=pk).values_list('updated_at', flat=True).afirst()
+        )
+    return request._debt_updated_at
+
+
+async def debt_detail_etag(request, pk, *args, **kwargs):
+    updated_at = await _debt_updated_at(request, pk)
+    return debt_etag(pk, updated_at) if updated_at else None
+
+
+async def debt_detail_last_modified(request, pk, *args, **kwargs):
+    return await _debt_updated_at(request, pk)
+
+
+# django.views.decorators.http.condition() calls its functions synchronously
+# even around async views, which rules out the async ORM. This one decorates
+# async view methods directly: method_decorator() hides them from adrf.
+def async_condition(etag_func, last_modified_func):
+    def decorator(method):
+        @wraps(method)
+        async def inner(view, request, *args, **kwargs):
+            res_etag = await etag_func(request, *args, **kwargs)
+            res_etag = quote_etag(res_etag) if res_etag is not None else None
+            res_last_modified = await last_modified_func(request, *args, **kwargs)
+            res_last_modified = int(res_last_modified.timestamp()) if res_last_modified else None
+
+            response = get_conditional_response(request, etag=res_etag, last_modified=res_last_modified)
+            if response is None:
+                response = await method(view, request, *args, **kwargs)
+
+            if request.method in ('GET', 'HEAD'):
+                if res_last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(res_last_modified)
+                if res_etag:
+                    response.headers.setdefault('ETag', res_etag)
+            return response
+
+        return inner
+
+    return decorator
+
+
+def check_if_match(request, current_etag):
+    if_match = request.META.get('HTTP_IF_MATCH')
+    if if_match is None:
+        return
+    etags = parse_etags(if_match)
+    if '*' not in etags and current_etag not in etags:
+        raise PreconditionFailed()
+
+
+class DebtListView(AsyncAPIView, generics.ListCreateAPIView):
     queryset = Debt.objects.all()
     serializer_class = DebtSerializer
     permission_classes = [IsAuthenticated]
 
+    @property
+    def paginator(self):
+        request = getattr(self, 'request', None)
+        if not hasattr(self, '_paginator') and request is not None:
+            if request.query_params.get('pagination') == 'cursor':
+                self._paginator = DebtKeysetPagination()
+        return super().paginator
+
+    @replica_reads
+    @async_condition(debt_list_etag, debt_list_last_modified)
+    async def get(self, request, *args, **kwargs):
+        # Revalidations are answered from the cache without leaving the event
+        # loop. The paginators and the merge with recurring occurrences are
+        # synchronous, so a full page is built in a single thread hop.
+        return await sync_to_async(self.list)(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.create)(request, *args, **kwargs)
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CreateDebtSerializer
         return DebtSerializer
 
     def get_queryset(self):
-        queryset = Debt.objects.filter(user=self.request.user)
-        start_date = self.request.query_params.get('start_date', None)
-        end_date = self.request.query_params.get('end_date', None)
-        search = self.request.query_params.get('search', None)
-        debt_status = self.request.query_params.get('status', None)
-
-        if start_date:
-            try:
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(due_date__gte=start_date)
-            except ValueError:
-                raise ValidationError("Invalid start_date format. Please use YYYY-MM-DD.")
-
-        if end_date:
-            try:
-                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(due_date__lte=end_date)
-            except ValueError:
-                raise ValidationError("Invalid end_date format. Please use YYYY-MM-DD.")
-
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | Q(notes__icontains=search)
-            )
-
-        if debt_status:
-            valid_statuses = [Debt.PENDING, Debt.OVERDUE, Debt.PAID]
-            if debt_status not in valid_statuses:
-                raise ValidationError("Invalid status value. Valid options are: PENDING, OVERDUE, PAID.")
-            queryset = queryset.filter(status=debt_status)
+        queryset = filter_debts(Debt.objects.filter(user=self.request.user), self.request.query_params)
 
         distant_future = datetime(9999, 12, 31).date()
 
@@ -67,25 +172,223 @@ class DebtListView(generics.ListCreateAPIView):
                 default=Value(distant_future, output_field=DateField()),
                 output_field=DateField()
             )
-        ).order_by(
-            'overdue_priority',
-            'upcoming_priority',
-            'status'
         )
 
+        ordering = ['overdue_priority', 'upcoming_priority', 'status', 'id']
+        if is_ranked_search(self.request.query_params):
+            ordering.insert(0, '-search_rank')
+        queryset = queryset.order_by(*ordering)
+
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        fields = parse_debt_fields(request.query_params)
+        queryset = self.filter_queryset(self.get_queryset())
+
+        ordering = [field.lstrip('-') for field in queryset.query.order_by]
+        queryset = queryset.values(*fields, *[field for field in ordering if field not in fields])
+
+        occurrences = list_occurrences(request.user, request.query_params, timezone.localdate())
+        rows = DebtOccurrenceRows(queryset, [occurrence_row(debt) for debt in occurrences])
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(DebtValuesSerializer(page, fields).data)
+
+        return Response(DebtValuesSerializer(rows[:], fields).data)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class DebtDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DebtExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @replica_reads
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', CSV)
+        if output not in EXPORT_FORMATS:
+            raise ValidationError("Invalid output value. Valid options are: csv, ndjson.")
+
+        # The rows are streamed after the view returns, so the database is picked now.
+        queryset = filter_debts(Debt.objects.filter(user=request.user), request.query_params).order_by('id')
+        queryset = queryset.using(read_database())
+        content_type, filename = EXPORT_FORMATS[output]
+
+        stream = EXPORT_STREAMS[output](queryset)
+        if isinstance(request._request, ASGIRequest):
+            stream = AsyncExportStream(stream)
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class DebtSyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        debts, deleted, next_token, has_more = get_debt_changes(request.user, request.query_params.get('since'))
+
+        return Response({
+            'changes': DebtSerializer(debts, many=True).data,
+            'deleted': deleted,
+            'next': next_token,
+            'has_more': has_more,
+        })
+
+
+class DebtImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'No file was submitted.'})
+
+        file_format = request.data.get('file_format') or guess_file_format(upload.name)
+        if file_format not in ROW_PARSERS:
+            raise ValidationError({'file_format': 'Valid options are: csv, ofx.'})
+
+        if upload.size <= IMPORT_INLINE_MAX_BYTES:
+            debt_import = DebtImport.objects.create(user=request.user, file_format=file_format)
+            try:
+                run_debt_import(debt_import, upload)
+            except DatabaseError:
+                return Response(DebtImportSerializer(debt_import).data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(DebtImportSerializer(debt_import).data, status=status.HTTP_201_CREATED)
+
+        debt_import = DebtImport.objects.create(user=request.user, file_format=file_format, file=upload)
+        transaction.on_commit(lambda: import_debts_file.delay(debt_import.pk))
+        return Response(DebtImportSerializer(debt_import).data, status=status.HTTP_202_ACCEPTED)
+
+
+class DebtImportDetailView(generics.RetrieveAPIView):
+    serializer_class = DebtImportSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return DebtImport.objects.filter(user=self.request.user)
+
+
+class DebtBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+
+        if not isinstance(operations, list) or not operations:
+            raise ValidationError({'operations': 'Expected a non-empty list of operations.'})
+        if len(operations) > BULK_DEBT_MAX_OPERATIONS:
+            raise ValidationError({'operations': f'At most {BULK_DEBT_MAX_OPERATIONS} operations per request.'})
+
+        results, applied = apply_bulk_debt_operations(request.user, operations)
+
+        return Response(
+            {'applied': applied, 'results': results},
+            status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class DebtDetailView(AsyncAPIView, generics.RetrieveUpdateDestroyAPIView):
     queryset = Debt.objects.all()
     serializer_class = DebtSerializer
     permission_classes = [IsAuthenticated]
 
+    @replica_reads
+    @async_condition(debt_detail_etag, debt_detail_last_modified)
+    async def get(self, request, *args, **kwargs):
+        debt = await aget_object_or_404(self.get_queryset(), pk=kwargs['pk'])
+        self.check_object_permissions(request, debt)
+        return Response(self.get_serializer(debt).data)
+
+    # Writes keep the synchronous path: they run in a transaction and lock
+    # the row with select_for_update().
+    async def put(self, request, *args, **kwargs):
+        return await sync_to_async(self.update)(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(self.partial_update)(request, *args, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        return await sync_to_async(self.destroy)(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = Debt.objects.filter(user=self.request.user)
+        if self.request.method in ('PUT', 'PATCH'):
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset
+
+    def get_object(self):
+        debt = super().get_object()
+        if self.request.method in ('PUT', 'PATCH'):
+            check_if_match(self.request, debt_etag(debt.pk, debt.updated_at))
+        return debt
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        debt = serializer.save()
+        self.headers['ETag'] = debt_etag(debt.pk, debt.updated_at)
+
+
+class RecurringDebtListView(generics.ListCreateAPIView):
+    serializer_class = RecurringDebtSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return RecurringDebt.objects.filter(user=self.request.user).defer('search_vector').order_by('id')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class RecurringDebtDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = RecurringDebtSerializer
+    permission_classes = [IsAuthenticated]
+
     def get_queryset(self):
-        return Debt.objects.filter(user=self.request.user)
+        return RecurringDebt.objects.filter(user=self.request.user).defer('search_vector')
+
+
+class RecurringDebtOccurrenceView(generics.GenericAPIView):
+    serializer_class = DebtOccurrenceSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return RecurringDebt.objects.filter(user=self.request.user).defer('search_vector')
+
+    def post(self, request, *args, **kwargs):
+        recurrence = self.get_object()
+        serializer = self.get_serializer(
+            data=request.data, context={**self.get_serializer_context(), 'recurrence': recurrence}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        changes = dict(serializer.validated_data)
+        occurrence_date = changes.pop('occurrence_date')
+        debt, created = materialize_occurrence(recurrence, occurrence_date, changes, timezone.localdate())
+
+        return Response(DebtSerializer(debt).data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        recurrence = self.get_object()
+        serializer = self.get_serializer(
+            data={'occurrence_date': request.query_params.get('occurrence_date')},
+            context={**self.get_serializer_context(), 'recurrence': recurrence},
+        )
+        serializer.is_valid(raise_exception=True)
+
+        skip_occurrence(recurrence, serializer.validated_data['occurrence_date'])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def category_list_etag(request, *args, **kwargs):
+    return f'"categories-{category_cache.version}"'
 
 
 class CategoryListView(generics.ListCreateAPIView):
@@ -93,6 +396,20 @@ class CategoryListView(generics.ListCreateAPIView):
     serializer_class = CategorySerializer
     permission_classes = [IsAdminUser]
 
+    @replica_reads
+    @method_decorator(etag(category_list_etag))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        categories = category_cache.all()
+
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        return Response(self.get_serializer(categories, many=True).data)
+
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
@@ -100,33 +417,21 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminUser]
 
 
-class MeApi(APIView):
+class ForecastView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
+        horizon, bucket = parse_forecast_params(request.query_params)
+        return Response(get_forecast(request.user.id, timezone.localdate(), horizon, bucket))
+
+
+class MeApi(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @replica_reads
+    async def get(self, request, *args, **kwargs):
         try:
-            debts = Debt.objects.filter(user=request.user)
-
-            total_debts = debts.count()
-            total_debts_amount_sum = debts.aggregate(Sum('amount'))['amount__sum'] or 0
-            total_paid_debts_sum = debts.filter(status=Debt.PAID).aggregate(Sum('amount'))['amount__sum'] or 0
-            total_overdue_debts_sum = debts.filter(status=Debt.OVERDUE).aggregate(Sum('amount'))['amount__sum'] or 0
-            total_pending_debts_sum = debts.filter(status=Debt.PENDING).aggregate(Sum('amount'))['amount__sum'] or 0
-
-            total_paid_debts = debts.filter(status=Debt.PAID).count()
-            total_overdue_debts = debts.filter(status=Debt.OVERDUE).count()
-            total_pending_debts = debts.filter(status=Debt.PENDING).count()
-
-            financial_summary = {
-                'total_debts': total_debts,
-                'total_debts_amount_sum': total_debts_amount_sum,
-                'total_paid_debts': total_paid_debts,
-                'total_paid_debts_sum': total_paid_debts_sum,
-                'total_overdue_debts': total_overdue_debts,
-                'total_overdue_debts_sum': total_overdue_debts_sum,
-                'total_pending_debts': total_pending_debts,
-                'total_pending_debts_sum': total_pending_debts_sum,
-            }
+            financial_summary = await aget_financial_summary(request.user.id)
 
             return Response(financial_summary)
 
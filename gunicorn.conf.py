@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+
+from FINANCE_CORE.metrics import mark_process_dead, reset_multiproc_dir
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8888')}"
+
+# Sync workers serve FINANCE_CORE.wsgi. To serve FINANCE_CORE.asgi instead,
+# set GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker, but only once
+# `make benchmark-concurrency` shows it ahead of the sync workers.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+
+# Sync workers need the usual 2 * cores + 1; one per core is enough for
+# ASGI. Every worker opens its own database connections.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+# Sync workers only: requests served at the same time by each worker.
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+
+# Workers that do not notify the arbiter for this long are restarted.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycling workers bounds slow leaks; the jitter keeps them from restarting together.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+
+def on_starting(server):
+    reset_multiproc_dir()
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid)
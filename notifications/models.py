@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(null=True, blank=True)
+    from_email = models.CharField(max_length=254, null=True, blank=True)
+    to = models.EmailField()
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+    def to_message(self):
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=[self.to],
+            reply_to=[self.from_email] if self.from_email else None,
+        )
+        if self.html_body:
+            message.attach_alternative(self.html_body, "text/html")
+        return message
+
+    def mark_sent(self):
+        self.status = self.SENT
+        self.sent_at = timezone.now()
+        self.last_error = None
+
+    def mark_failed(self, error):
+        self.attempts += 1
+        self.last_error = error
+        if self.attempts >= settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS:
+            self.status = self.FAILED
+        else:
+            backoff = settings.NOTIFICATIONS_OUTBOX_RETRY_BACKOFF * 2 ** (self.attempts - 1)
+            self.available_at = timezone.now() + timedelta(seconds=backoff)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['available_at'],
+                name='outbox_pending_available_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
@@ -0,0 +1,26 @@
+import os
+
+from django.db import transaction
+
+from .models import OutboxEmail
+
+
+def enqueue_emails(outbox_emails):
+    from .tasks import dispatch_outbox
+
+    if not outbox_emails:
+        return
+
+    default_from_email = os.environ.get("EMAIL_HOST_USER")
+    for outbox_email in outbox_emails:
+        if outbox_email.from_email is None:
+            outbox_email.from_email = default_from_email
+
+    OutboxEmail.objects.bulk_create(outbox_emails, ignore_conflicts=True)
+    transaction.on_commit(dispatch_outbox.delay, robust=True)
+
+
+def enqueue_email(*, subject, body, to, html_body=None, dedupe_key=None):
+    enqueue_emails([
+        OutboxEmail(subject=subject, body=body, html_body=html_body, to=to, dedupe_key=dedupe_key)
+    ])
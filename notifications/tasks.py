@@ -0,0 +1,89 @@
+import smtplib
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def _connection_lost(error):
+    # Errors the server answers with belong to the email, except 421, which
+    # is the server closing the channel; socket errors belong to the connection.
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+def _send(connection, message):
+    try:
+        connection.send_messages([message])
+    except Exception as e:
+        if not _connection_lost(e):
+            raise
+        # A dropped connection says nothing about the email: reconnect and try
+        # it once more before giving up on the run.
+        connection.close()
+        try:
+            connection.open()
+        except Exception as open_error:
+            raise smtplib.SMTPServerDisconnected(f"Could not reconnect: {open_error}") from open_error
+        connection.send_messages([message])
+
+
+@shared_task
+def dispatch_outbox(batch_size=None, max_batches=None):
+    batch_size = batch_size or settings.NOTIFICATIONS_OUTBOX_BATCH_SIZE
+    max_batches = max_batches or settings.NOTIFICATIONS_OUTBOX_MAX_BATCHES
+
+    sent = failed = 0
+    connection = None
+    connection_lost = False
+
+    try:
+        for _ in range(max_batches):
+            with transaction.atomic():
+                emails = list(
+                    OutboxEmail.objects.filter(status=OutboxEmail.PENDING, available_at__lte=timezone.now())
+                    .select_for_update(skip_locked=True)
+                    .order_by('available_at')[:batch_size]
+                )
+                if not emails:
+                    break
+
+                if connection is None:
+                    connection = get_connection()
+                    connection.open()
+
+                processed = []
+                for email in emails:
+                    try:
+                        _send(connection, email.to_message())
+                    except Exception as e:
+                        # The emails not processed yet stay as they were, without
+                        # an attempt counted against them.
+                        if _connection_lost(e):
+                            connection_lost = True
+                            break
+                        email.mark_failed(str(e))
+                        failed += 1
+                    else:
+                        email.mark_sent()
+                        sent += 1
+                    processed.append(email)
+
+                OutboxEmail.objects.bulk_update(
+                    processed, ['status', 'attempts', 'last_error', 'available_at', 'sent_at']
+                )
+
+            if connection_lost or len(emails) < batch_size:
+                break
+    finally:
+        if connection is not None:
+            connection.close()
+
+    return f"{sent} emails sent and {failed} failed."